@@ -0,0 +1,66 @@
+"""add indexes for filtering and searching users
+
+Revision ID: 3f7a9c2b5e81
+Revises: 8c4d2a6e9f13
+Create Date: 2026-10-17 19:02:37.815420
+
+"""
+
+from collections.abc import Sequence
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "3f7a9c2b5e81"
+down_revision: str | Sequence[str] | None = "8c4d2a6e9f13"
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+NOT_DELETED_INDEXES = {
+    "ix_users_not_deleted_roles_id": ["roles", "id"],
+    "ix_users_not_deleted_is_active_id": ["is_active", "id"],
+    "ix_users_not_deleted_time_added_id": ["time_added", "id"],
+}
+SEARCH_COLUMNS = ("username", "email")
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    for name, columns in NOT_DELETED_INDEXES.items():
+        op.create_index(
+            name,
+            "users",
+            columns,
+            unique=False,
+            postgresql_where=sa.text("is_deleted = false"),
+            sqlite_where=sa.text("is_deleted = 0"),
+        )
+    # SQLite cannot use an expression index for LIKE
+    if op.get_bind().dialect.name != "postgresql":
+        return
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    for column in SEARCH_COLUMNS:
+        op.create_index(
+            f"ix_users_{column}_lower",
+            "users",
+            [sa.text(f"lower({column}) text_pattern_ops")],
+            unique=False,
+        )
+        op.create_index(
+            f"ix_users_{column}_trgm",
+            "users",
+            [sa.text(f"lower({column}) gin_trgm_ops")],
+            unique=False,
+            postgresql_using="gin",
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    if op.get_bind().dialect.name == "postgresql":
+        for column in SEARCH_COLUMNS:
+            op.drop_index(f"ix_users_{column}_trgm", table_name="users")
+            op.drop_index(f"ix_users_{column}_lower", table_name="users")
+    for name in NOT_DELETED_INDEXES:
+        op.drop_index(name, table_name="users")
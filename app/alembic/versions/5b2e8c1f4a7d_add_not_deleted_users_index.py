@@ -0,0 +1,35 @@
+"""add partial index on live users for keyset pagination
+
+Revision ID: 5b2e8c1f4a7d
+Revises: d19241fe0efb
+Create Date: 2026-10-17 16:05:12.418203
+
+"""
+
+from collections.abc import Sequence
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "5b2e8c1f4a7d"
+down_revision: str | Sequence[str] | None = "d19241fe0efb"
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index(
+        "ix_users_not_deleted_id",
+        "users",
+        ["id"],
+        unique=False,
+        postgresql_where=sa.text("is_deleted = false"),
+        sqlite_where=sa.text("is_deleted = 0"),
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index("ix_users_not_deleted_id", table_name="users")
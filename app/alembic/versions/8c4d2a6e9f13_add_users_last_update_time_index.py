@@ -0,0 +1,32 @@
+"""add index on users.last_update_time for the collection version
+
+Revision ID: 8c4d2a6e9f13
+Revises: 5b2e8c1f4a7d
+Create Date: 2026-10-17 17:20:41.503114
+
+"""
+
+from collections.abc import Sequence
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "8c4d2a6e9f13"
+down_revision: str | Sequence[str] | None = "5b2e8c1f4a7d"
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index(
+        op.f("ix_users_last_update_time"),
+        "users",
+        ["last_update_time"],
+        unique=False,
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f("ix_users_last_update_time"), table_name="users")
@@ -1,8 +1,25 @@
 from fastapi import APIRouter
+from fastapi.responses import ORJSONResponse
 
-from app.api.api_v1.endpoints import auth, users, utils
+from app.api.api_v1.endpoints import (
+    admin,
+    auth,
+    auth_async,
+    users,
+    users_async,
+    users_bulk,
+    utils,
+)
+from app.core.config import settings
 
-api_router = APIRouter()
-api_router.include_router(auth.router, prefix="/auth", tags=["auth"])
-api_router.include_router(users.router, prefix="/users", tags=["users"])
+api_router = APIRouter(default_response_class=ORJSONResponse)
+# Mounted first so /users/export etc. are not captured by /users/{user_id}
+api_router.include_router(users_bulk.router, prefix="/users", tags=["users"])
+if settings.DB_MODE == "async":
+    api_router.include_router(auth_async.router, prefix="/auth", tags=["auth"])
+    api_router.include_router(users_async.router, prefix="/users", tags=["users"])
+else:
+    api_router.include_router(auth.router, prefix="/auth", tags=["auth"])
+    api_router.include_router(users.router, prefix="/users", tags=["users"])
 api_router.include_router(utils.router, prefix="/utils", tags=["utils"])
+api_router.include_router(admin.router, prefix="/admin", tags=["admin"])
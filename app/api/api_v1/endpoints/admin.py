@@ -0,0 +1,125 @@
+from typing import Any, Literal
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import JSONResponse, PlainTextResponse
+
+from app.api import deps
+from app.core import profiling, query_stats, threadpool
+from app.core.db import pool_stats, replicas
+from app.core.request_metrics import TimedRoute
+from app.core.security import password_hash_pool
+from app.models.user import User
+from app.utils.email import email_queue
+
+router = APIRouter(route_class=TimedRoute)
+
+
+@router.get("/db-pool")
+def read_db_pool_stats(
+    current_user: User = Depends(deps.get_current_admin_user),
+) -> Any:
+    """
+    Connection pool usage and checkout wait times per engine. (Admin only)
+    """
+    return {name: stats.snapshot() for name, stats in pool_stats.items()}
+
+
+@router.get("/db-replicas")
+def read_db_replica_stats(
+    current_user: User = Depends(deps.get_current_admin_user),
+) -> Any:
+    """
+    Read replica health and replication lag from the last check. (Admin only)
+    """
+    return replicas.snapshot()
+
+
+@router.get("/password-hashing")
+def read_password_hashing_stats(
+    current_user: User = Depends(deps.get_current_admin_user),
+) -> Any:
+    """
+    Password hashing pool load and per-call latency. (Admin only)
+    """
+    return password_hash_pool.snapshot()
+
+
+@router.get("/threadpool")
+async def read_threadpool_stats(
+    current_user: User = Depends(deps.get_current_admin_user),
+) -> Any:
+    """
+    Threads in use, waiting calls and thread wait times per limiter. (Admin only)
+    """
+    # async so the limiters are read from the event loop
+    return threadpool.snapshot()
+
+
+@router.get("/email-queue")
+def read_email_queue_stats(
+    current_user: User = Depends(deps.get_current_admin_user),
+) -> Any:
+    """
+    Outbound email queue depth, delivery counts and latency. (Admin only)
+    """
+    return email_queue.snapshot()
+
+
+@router.get("/queries")
+def read_query_report(
+    current_user: User = Depends(deps.get_current_admin_user),
+) -> Any:
+    """
+    SQL statements per route, by normalised SQL, for this worker. (Admin only)
+    """
+    return query_stats.report.snapshot()
+
+
+@router.get("/profiles")
+def read_profiles(
+    current_user: User = Depends(deps.get_current_admin_user),
+) -> Any:
+    """
+    Recent request profiles held by this worker, newest first. (Admin only)
+    """
+    return [profile.summary() for profile in profiling.profiles.list()]
+
+
+def _get_profile(profile_id: int) -> profiling.Profile:
+    profile = profiling.profiles.get(profile_id)
+    if profile is None:
+        raise HTTPException(status_code=404, detail="Profile not found")
+    return profile
+
+
+@router.get("/profiles/{profile_id}")
+def read_profile(
+    profile_id: int,
+    current_user: User = Depends(deps.get_current_admin_user),
+) -> Any:
+    """
+    A request profile with its SQL statements and timings. (Admin only)
+    """
+    return _get_profile(profile_id).detail()
+
+
+@router.get("/profiles/{profile_id}/download")
+def download_profile(
+    profile_id: int,
+    file_format: Literal["speedscope", "collapsed"] = Query(
+        "speedscope", alias="format"
+    ),
+    current_user: User = Depends(deps.get_current_admin_user),
+) -> Any:
+    """
+    Download a profile for speedscope or as collapsed stacks. (Admin only)
+    """
+    profile = _get_profile(profile_id)
+    if file_format == "collapsed":
+        filename = f"profile-{profile_id}.txt"
+        response = PlainTextResponse(profile.collapsed())
+    else:
+        filename = f"profile-{profile_id}.speedscope.json"
+        response = JSONResponse(profile.speedscope())
+    response.headers["Content-Disposition"] = f'attachment; filename="{filename}"'
+    return response
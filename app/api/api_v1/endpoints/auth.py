@@ -7,16 +7,20 @@ from pydantic import BaseModel, ValidationError
 from sqlalchemy.orm import Session
 
 from app.api import deps
-from app.core import security
+from app.core import principal_cache, security, threadpool
 from app.core.config import settings
 from app.models.user import User
-from app.schemas.token import Token, TokenPayload
+from app.schemas.token import Token
 from app.utils.email import send_reset_password_email
 
-router = APIRouter()
+router = APIRouter(route_class=threadpool.limited_route("auth"))
 
 
-@router.post("/login/access-token", response_model=Token)
+@router.post(
+    "/login/access-token",
+    response_model=Token,
+    dependencies=[Depends(deps.rate_limit_login)],
+)
 def login_access_token(
     db: Session = Depends(deps.get_db), form_data: OAuth2PasswordRequestForm = Depends()
 ):
@@ -24,13 +28,23 @@ def login_access_token(
     OAuth2 compatible token login, get an access token for future requests.
     """
     user = db.query(User).filter(User.username == form_data.username).first()
-    if not user or not security.verify_password(
+    if not user:
+        raise HTTPException(status_code=400, detail="Incorrect username or password")
+    verified, new_hash = security.verify_and_update_password(
         form_data.password, user.hashed_password
-    ):
+    )
+    if not verified:
         raise HTTPException(status_code=400, detail="Incorrect username or password")
     elif not user.is_active or user.is_deleted:
         raise HTTPException(status_code=400, detail="Inactive user")
 
+    # Migrate hashes made with an old scheme or cost while we have the password
+    if new_hash:
+        user.hashed_password = new_hash
+        db.add(user)
+        db.commit()
+        principal_cache.invalidate(user.id)
+
     access_token_expires = timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
     return {
         "access_token": security.create_access_token(
@@ -41,23 +55,24 @@ def login_access_token(
     }
 
 
-@router.post("/login/refresh-token", response_model=Token)
+@router.post(
+    "/login/refresh-token",
+    response_model=Token,
+    dependencies=[Depends(deps.rate_limit_refresh)],
+)
 def refresh_token(token: str, db: Session = Depends(deps.get_db)):
     """
     Refresh tokens.
     """
     try:
-        payload = jwt.decode(
-            token, settings.SECRET_KEY, algorithms=[security.ALGORITHM]
-        )
-        token_data = TokenPayload(**payload)
+        token_data = security.decode_token(token)
         if not token_data.refresh:
             raise HTTPException(status_code=400, detail="Invalid refresh token")
         if not token_data.sub:
             raise HTTPException(
                 status_code=403, detail="Could not validate credentials"
             )
-    except (jwt.PyJWTError, ValidationError):
+    except jwt.PyJWTError:
         raise HTTPException(status_code=403, detail="Could not validate credentials")
 
     user = db.query(User).filter(User.id == int(token_data.sub)).first()
@@ -74,7 +89,9 @@ def refresh_token(token: str, db: Session = Depends(deps.get_db)):
     }
 
 
-@router.post("/password-recovery/{email}")
+@router.post(
+    "/password-recovery/{email}", dependencies=[Depends(deps.rate_limit_recovery)]
+)
 def recover_password(email: str, db: Session = Depends(deps.get_db)):
     """
     Password Recovery.
@@ -122,4 +139,5 @@ def reset_password(body: ResetPasswordInput, db: Session = Depends(deps.get_db))
     user.hashed_password = hashed_password
     db.add(user)
     db.commit()
+    principal_cache.invalidate(user.id)
     return {"msg": "Password updated successfully"}
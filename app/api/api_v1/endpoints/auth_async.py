@@ -0,0 +1,148 @@
+from datetime import timedelta
+
+import jwt
+from fastapi import APIRouter, Depends, HTTPException
+from fastapi.concurrency import run_in_threadpool
+from fastapi.security import OAuth2PasswordRequestForm
+from pydantic import ValidationError
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.api import deps
+from app.api.api_v1.endpoints.auth import ResetPasswordInput
+from app.core import principal_cache, security
+from app.core.config import settings
+from app.core.request_metrics import TimedRoute
+from app.models.user import User
+from app.schemas.token import Token
+from app.utils.email import send_reset_password_email
+
+router = APIRouter(route_class=TimedRoute)
+
+
+@router.post(
+    "/login/access-token",
+    response_model=Token,
+    dependencies=[Depends(deps.rate_limit_login)],
+)
+async def login_access_token(
+    db: AsyncSession = Depends(deps.get_async_db),
+    form_data: OAuth2PasswordRequestForm = Depends(),
+):
+    """
+    OAuth2 compatible token login, get an access token for future requests.
+    """
+    user = await db.scalar(select(User).where(User.username == form_data.username))
+    if not user:
+        raise HTTPException(status_code=400, detail="Incorrect username or password")
+    verified, new_hash = await security.verify_and_update_password_async(
+        form_data.password, user.hashed_password
+    )
+    if not verified:
+        raise HTTPException(status_code=400, detail="Incorrect username or password")
+    elif not user.is_active or user.is_deleted:
+        raise HTTPException(status_code=400, detail="Inactive user")
+
+    # Migrate hashes made with an old scheme or cost while we have the password
+    if new_hash:
+        user.hashed_password = new_hash
+        db.add(user)
+        await db.commit()
+        principal_cache.invalidate(user.id)
+
+    access_token_expires = timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
+    return {
+        "access_token": security.create_access_token(
+            user.id, expires_delta=access_token_expires
+        ),
+        "refresh_token": security.create_refresh_token(user.id),
+        "token_type": "bearer",
+    }
+
+
+@router.post(
+    "/login/refresh-token",
+    response_model=Token,
+    dependencies=[Depends(deps.rate_limit_refresh)],
+)
+async def refresh_token(token: str, db: AsyncSession = Depends(deps.get_async_db)):
+    """
+    Refresh tokens.
+    """
+    try:
+        token_data = security.decode_token(token)
+        if not token_data.refresh:
+            raise HTTPException(status_code=400, detail="Invalid refresh token")
+        if not token_data.sub:
+            raise HTTPException(
+                status_code=403, detail="Could not validate credentials"
+            )
+    except jwt.PyJWTError:
+        raise HTTPException(status_code=403, detail="Could not validate credentials")
+
+    user = await db.scalar(select(User).where(User.id == int(token_data.sub)))
+    if not user or not user.is_active or user.is_deleted:
+        raise HTTPException(status_code=404, detail="User not found or inactive")
+
+    access_token_expires = timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
+    return {
+        "access_token": security.create_access_token(
+            user.id, expires_delta=access_token_expires
+        ),
+        "refresh_token": security.create_refresh_token(user.id),
+        "token_type": "bearer",
+    }
+
+
+@router.post(
+    "/password-recovery/{email}", dependencies=[Depends(deps.rate_limit_recovery)]
+)
+async def recover_password(email: str, db: AsyncSession = Depends(deps.get_async_db)):
+    """
+    Password Recovery.
+    """
+    user = await db.scalar(select(User).where(User.email == email))
+    if not user:
+        raise HTTPException(status_code=404, detail="User not found in system")
+
+    password_reset_token = security.create_access_token(
+        subject=email, expires_delta=timedelta(hours=1)
+    )
+    await run_in_threadpool(
+        send_reset_password_email,
+        email_to=user.email,
+        email=user.email,
+        token=password_reset_token,
+    )
+    return {"msg": "Password recovery email sent"}
+
+
+@router.post("/reset-password")
+async def reset_password(
+    body: ResetPasswordInput, db: AsyncSession = Depends(deps.get_async_db)
+):
+    """
+    Reset password based on token.
+    """
+    try:
+        payload = jwt.decode(
+            body.token, settings.SECRET_KEY, algorithms=[security.ALGORITHM]
+        )
+        email = payload.get("sub")
+        if not email:
+            raise HTTPException(status_code=400, detail="Invalid token")
+    except (jwt.PyJWTError, ValidationError):
+        raise HTTPException(status_code=403, detail="Invalid token")
+
+    user = await db.scalar(select(User).where(User.email == email))
+    if not user:
+        raise HTTPException(status_code=404, detail="User not found")
+    elif not user.is_active or user.is_deleted:
+        raise HTTPException(status_code=400, detail="Inactive user")
+
+    hashed_password = await security.get_password_hash_async(body.new_password)
+    user.hashed_password = hashed_password
+    db.add(user)
+    await db.commit()
+    principal_cache.invalidate(user.id)
+    return {"msg": "Password updated successfully"}
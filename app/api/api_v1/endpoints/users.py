@@ -1,24 +1,40 @@
 from datetime import datetime, timezone
 from typing import Any
 
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Request, Response
+from fastapi.responses import ORJSONResponse
+from sqlalchemy import func, or_, select, update
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
 
 from app.api import deps
-from app.core import security
+from app.core import (
+    http_cache,
+    pagination,
+    principal_cache,
+    query_stats,
+    security,
+    threadpool,
+    user_query,
+)
+from app.core.db import insert_ignoring_conflicts, unique_violation, use_replica
 from app.models.user import User, UserRole
 from app.schemas.user import (
+    USER_RESPONSE_FIELDS,
     UserCreate,
+    UserFilter,
     UserListResponse,
     UserPasswordUpdate,
     UserResponse,
     UserUpdateMe,
 )
 
-router = APIRouter()
+router = APIRouter(route_class=threadpool.limited_route("users"))
 
 
 @router.post("/", response_model=UserResponse)
+@threadpool.run_on("auth")
+@query_stats.query_budget(2)
 def create_user(
     *,
     db: Session = Depends(deps.get_db),
@@ -28,17 +44,6 @@ def create_user(
     """
     Create new user. (Admin only)
     """
-    user = (
-        db.query(User)
-        .filter((User.email == user_in.email) | (User.username == user_in.username))
-        .first()
-    )
-    if user:
-        raise HTTPException(
-            status_code=400,
-            detail="The user with this user name or email already exists in the system.",
-        )
-
     # Avoid creating superadmins if not superadmin
     if (
         user_in.roles == UserRole.SUPERADMIN
@@ -49,32 +54,47 @@ def create_user(
         )
 
     hashed_password = security.get_password_hash(user_in.password)
-    db_obj = User(
-        email=user_in.email,
-        username=user_in.username,
-        hashed_password=hashed_password,
-        roles=user_in.roles,
-        is_active=user_in.is_active,
-        added_by=current_user.username,
-        time_added=datetime.now(timezone.utc),
+    # The unique indexes on username and email decide, in the INSERT itself
+    db_obj = db.scalar(
+        insert_ignoring_conflicts(db, User)
+        .values(
+            email=user_in.email,
+            username=user_in.username,
+            hashed_password=hashed_password,
+            roles=user_in.roles,
+            is_active=user_in.is_active,
+            added_by=current_user.username,
+            time_added=datetime.now(timezone.utc),
+        )
+        .returning(User)
     )
-    db.add(db_obj)
+    if db_obj is None:
+        raise HTTPException(
+            status_code=400,
+            detail="The user with this user name or email already exists in the system.",
+        )
     db.commit()
-    db.refresh(db_obj)
     return db_obj
 
 
 @router.get("/me", response_model=UserResponse)
 def read_user_me(
+    request: Request,
+    response: Response,
     current_user: User = Depends(deps.get_current_active_user),
 ) -> Any:
     """
     Get current user.
     """
+    etag = http_cache.user_etag(current_user)
+    if http_cache.is_fresh(request, etag):
+        return http_cache.not_modified(etag)
+    http_cache.set_headers(response, etag)
     return current_user
 
 
 @router.patch("/me", response_model=UserResponse)
+@query_stats.query_budget(2)
 def update_user_me(
     *,
     db: Session = Depends(deps.get_db),
@@ -85,33 +105,31 @@ def update_user_me(
     Update own user profile.
     """
     if user_in.email:
-        existing_email = (
-            db.query(User)
-            .filter(User.email == user_in.email, User.id != current_user.id)
-            .first()
-        )
-        if existing_email:
-            raise HTTPException(status_code=409, detail="Email already taken")
         current_user.email = user_in.email
     if user_in.username:
-        existing_username = (
-            db.query(User)
-            .filter(User.username == user_in.username, User.id != current_user.id)
-            .first()
-        )
-        if existing_username:
-            raise HTTPException(status_code=409, detail="Username already taken")
         current_user.username = user_in.username
 
     current_user.last_updated_by = current_user.username
     current_user.last_update_time = datetime.now(timezone.utc)
     db.add(current_user)
-    db.commit()
-    db.refresh(current_user)
+    # A taken email or username is rejected by its unique index on flush
+    try:
+        db.commit()
+    except IntegrityError as e:
+        db.rollback()
+        column = unique_violation(e, "email", "username")
+        if column is None:
+            raise
+        raise HTTPException(
+            status_code=409, detail=f"{column.capitalize()} already taken"
+        )
+    principal_cache.invalidate(current_user.id)
     return current_user
 
 
 @router.patch("/me/password")
+@threadpool.run_on("auth")
+@query_stats.query_budget(3)
 def update_password_me(
     *,
     db: Session = Depends(deps.get_db),
@@ -132,28 +150,92 @@ def update_password_me(
     current_user.last_update_time = datetime.now(timezone.utc)
     db.add(current_user)
     db.commit()
+    principal_cache.invalidate(current_user.id)
     return {"msg": "Password updated successfully"}
 
 
 @router.get("/", response_model=UserListResponse)
+@use_replica
 def read_users(
+    request: Request,
     skip: int = 0,
     limit: int = 100,
+    cursor: str | None = None,
+    sort: user_query.UserSort = "id",
+    count: pagination.CountMode = "exact",
+    user_filter: UserFilter = Depends(),
     db: Session = Depends(deps.get_db),
     current_user: User = Depends(deps.get_current_admin_user),
 ) -> Any:
     """
-    Retrieve users. (Admin only)
+    Retrieve users, filtered and sorted. (Admin only)
+
+    Pass ``next_cursor`` back as ``cursor``, with the same filters and sort,
+    to page by key instead of offset.
     """
-    query = db.query(User).filter(User.is_deleted == False)
-    total = query.count()
-    users = query.offset(skip).limit(limit).all()
-    return {"items": users, "total": total}
+    # A write moves the newest last_update_time or id. The live and active
+    # counts catch deletes and disables whose timestamp, written by a host
+    # with a slower clock, stays below the newest one.
+    version = db.query(
+        func.max(User.last_update_time),
+        func.max(User.id),
+        func.count().filter(User.is_deleted == False),
+        func.count().filter(User.is_active == True),
+    ).one()
+    etag = http_cache.collection_etag(
+        "users",
+        version,
+        skip,
+        limit,
+        cursor,
+        sort,
+        count,
+        user_filter.model_dump_json(exclude_none=True),
+    )
+    if http_cache.is_fresh(request, etag):
+        return http_cache.not_modified(etag)
+
+    columns = [getattr(User, name) for name in USER_RESPONSE_FIELDS]
+    query = db.query(*columns).filter(
+        User.is_deleted == False, *user_query.filter_clauses(user_filter)
+    )
+    total = None
+    if count == "estimated":
+        total = pagination.estimate_count(db, query.statement)
+    if total is None and count != "none":
+        total = query.count()
+
+    query = query.order_by(*user_query.order_by(sort))
+    if cursor is not None:
+        try:
+            query = query.filter(user_query.after_cursor(sort, cursor))
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+    else:
+        query = query.offset(skip)
+    rows = query.limit(limit).all()
+    next_cursor = None
+    if rows and len(rows) == limit:
+        next_cursor = user_query.next_cursor(sort, rows[-1])
+    # The rows already have UserResponse's shape; validating them again
+    # would cost more than encoding them
+    response = ORJSONResponse(
+        {
+            "items": [row._asdict() for row in rows],
+            "total": total,
+            "next_cursor": next_cursor,
+        }
+    )
+    http_cache.set_headers(response, etag)
+    return response
 
 
 @router.get("/{user_id}", response_model=UserResponse)
+@use_replica
 def read_user_by_id(
     user_id: int,
+    request: Request,
+    response: Response,
     db: Session = Depends(deps.get_db),
     current_user: User = Depends(deps.get_current_admin_user),
 ) -> Any:
@@ -163,10 +245,45 @@ def read_user_by_id(
     user = db.query(User).filter(User.id == user_id).first()
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
+    etag = http_cache.user_etag(user)
+    if http_cache.is_fresh(request, etag):
+        return http_cache.not_modified(etag)
+    http_cache.set_headers(response, etag)
+    return user
+
+
+def _update_other_user(
+    db: Session, user_id: int, current_user: User, verb: str, **values: Any
+) -> User:
+    """Apply ``values`` to another user in one UPDATE ... RETURNING."""
+    if user_id == current_user.id:
+        raise HTTPException(status_code=400, detail=f"Users cannot {verb} themselves")
+    allowed = [User.id == user_id]
+    # Avoid admins changing superadmins
+    if current_user.roles != UserRole.SUPERADMIN:
+        allowed.append(or_(User.roles.is_(None), User.roles != UserRole.SUPERADMIN))
+    user = db.scalar(
+        update(User)
+        .where(*allowed)
+        .values(
+            **values,
+            last_updated_by=current_user.username,
+            last_update_time=datetime.now(timezone.utc),
+        )
+        .returning(User)
+    )
+    if user is None:
+        # Only a refused update pays for finding out why
+        if db.scalar(select(User.id).where(User.id == user_id)) is None:
+            raise HTTPException(status_code=404, detail="User not found")
+        raise HTTPException(status_code=403, detail="Not enough privileges")
+    db.commit()
+    principal_cache.invalidate(user_id)
     return user
 
 
 @router.patch("/{user_id}/disable", response_model=UserResponse)
+@query_stats.query_budget(3)
 def disable_user(
     user_id: int,
     db: Session = Depends(deps.get_db),
@@ -175,26 +292,11 @@ def disable_user(
     """
     Disable a user. (Admin only)
     """
-    user = db.query(User).filter(User.id == user_id).first()
-    if not user:
-        raise HTTPException(status_code=404, detail="User not found")
-    if user.id == current_user.id:
-        raise HTTPException(status_code=400, detail="Users cannot disable themselves")
-
-    # Avoid admins disabling superadmins
-    if user.roles == UserRole.SUPERADMIN and current_user.roles != UserRole.SUPERADMIN:
-        raise HTTPException(status_code=403, detail="Not enough privileges")
-
-    user.is_active = False
-    user.last_updated_by = current_user.username
-    user.last_update_time = datetime.now(timezone.utc)
-    db.add(user)
-    db.commit()
-    db.refresh(user)
-    return user
+    return _update_other_user(db, user_id, current_user, "disable", is_active=False)
 
 
 @router.delete("/{user_id}", response_model=UserResponse)
+@query_stats.query_budget(3)
 def soft_delete_user(
     user_id: int,
     db: Session = Depends(deps.get_db),
@@ -203,21 +305,6 @@ def soft_delete_user(
     """
     Soft delete a user. (Admin only)
     """
-    user = db.query(User).filter(User.id == user_id).first()
-    if not user:
-        raise HTTPException(status_code=404, detail="User not found")
-    if user.id == current_user.id:
-        raise HTTPException(status_code=400, detail="Users cannot delete themselves")
-
-    # Avoid admins deleting superadmins
-    if user.roles == UserRole.SUPERADMIN and current_user.roles != UserRole.SUPERADMIN:
-        raise HTTPException(status_code=403, detail="Not enough privileges")
-
-    user.is_deleted = True
-    user.is_active = False
-    user.last_updated_by = current_user.username
-    user.last_update_time = datetime.now(timezone.utc)
-    db.add(user)
-    db.commit()
-    db.refresh(user)
-    return user
+    return _update_other_user(
+        db, user_id, current_user, "delete", is_deleted=True, is_active=False
+    )
@@ -0,0 +1,312 @@
+from datetime import datetime, timezone
+from typing import Any
+
+from fastapi import APIRouter, Depends, HTTPException, Request, Response
+from fastapi.responses import ORJSONResponse
+from sqlalchemy import func, or_, select, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.api import deps
+from app.core import (
+    http_cache,
+    pagination,
+    principal_cache,
+    query_stats,
+    security,
+    user_query,
+)
+from app.core.db import insert_ignoring_conflicts, unique_violation, use_replica
+from app.core.request_metrics import TimedRoute
+from app.models.user import User, UserRole
+from app.schemas.user import (
+    USER_RESPONSE_FIELDS,
+    UserCreate,
+    UserFilter,
+    UserListResponse,
+    UserPasswordUpdate,
+    UserResponse,
+    UserUpdateMe,
+)
+
+router = APIRouter(route_class=TimedRoute)
+
+
+@router.post("/", response_model=UserResponse)
+@query_stats.query_budget(2)
+async def create_user(
+    *,
+    db: AsyncSession = Depends(deps.get_async_db),
+    user_in: UserCreate,
+    current_user: User = Depends(deps.get_current_admin_user_async),
+) -> Any:
+    """
+    Create new user. (Admin only)
+    """
+    # Avoid creating superadmins if not superadmin
+    if (
+        user_in.roles == UserRole.SUPERADMIN
+        and current_user.roles != UserRole.SUPERADMIN
+    ):
+        raise HTTPException(
+            status_code=403, detail="Not enough privileges to create Superadmin"
+        )
+
+    hashed_password = await security.get_password_hash_async(user_in.password)
+    # The unique indexes on username and email decide, in the INSERT itself
+    db_obj = await db.scalar(
+        insert_ignoring_conflicts(db, User)
+        .values(
+            email=user_in.email,
+            username=user_in.username,
+            hashed_password=hashed_password,
+            roles=user_in.roles,
+            is_active=user_in.is_active,
+            added_by=current_user.username,
+            time_added=datetime.now(timezone.utc),
+        )
+        .returning(User)
+    )
+    if db_obj is None:
+        raise HTTPException(
+            status_code=400,
+            detail="The user with this user name or email already exists in the system.",
+        )
+    await db.commit()
+    return db_obj
+
+
+@router.get("/me", response_model=UserResponse)
+async def read_user_me(
+    request: Request,
+    response: Response,
+    current_user: User = Depends(deps.get_current_active_user_async),
+) -> Any:
+    """
+    Get current user.
+    """
+    etag = http_cache.user_etag(current_user)
+    if http_cache.is_fresh(request, etag):
+        return http_cache.not_modified(etag)
+    http_cache.set_headers(response, etag)
+    return current_user
+
+
+@router.patch("/me", response_model=UserResponse)
+@query_stats.query_budget(2)
+async def update_user_me(
+    *,
+    db: AsyncSession = Depends(deps.get_async_db),
+    user_in: UserUpdateMe,
+    current_user: User = Depends(deps.get_current_active_user_async),
+) -> Any:
+    """
+    Update own user profile.
+    """
+    if user_in.email:
+        current_user.email = user_in.email
+    if user_in.username:
+        current_user.username = user_in.username
+
+    current_user.last_updated_by = current_user.username
+    current_user.last_update_time = datetime.now(timezone.utc)
+    db.add(current_user)
+    # A taken email or username is rejected by its unique index on flush
+    try:
+        await db.commit()
+    except IntegrityError as e:
+        await db.rollback()
+        column = unique_violation(e, "email", "username")
+        if column is None:
+            raise
+        raise HTTPException(
+            status_code=409, detail=f"{column.capitalize()} already taken"
+        )
+    principal_cache.invalidate(current_user.id)
+    return current_user
+
+
+@router.patch("/me/password")
+@query_stats.query_budget(3)
+async def update_password_me(
+    *,
+    db: AsyncSession = Depends(deps.get_async_db),
+    body: UserPasswordUpdate,
+    current_user: User = Depends(deps.get_current_active_user_async),
+) -> Any:
+    """
+    Update own password.
+    """
+    # The principal cache leaves the hash out, and async sessions cannot
+    # lazy-load it
+    await db.refresh(current_user, ["hashed_password"])
+    if not await security.verify_password_async(
+        body.current_password, current_user.hashed_password
+    ):
+        raise HTTPException(status_code=400, detail="Incorrect password")
+
+    hashed_password = await security.get_password_hash_async(body.new_password)
+    current_user.hashed_password = hashed_password
+    current_user.last_updated_by = current_user.username
+    current_user.last_update_time = datetime.now(timezone.utc)
+    db.add(current_user)
+    await db.commit()
+    principal_cache.invalidate(current_user.id)
+    return {"msg": "Password updated successfully"}
+
+
+@router.get("/", response_model=UserListResponse)
+@use_replica
+async def read_users(
+    request: Request,
+    skip: int = 0,
+    limit: int = 100,
+    cursor: str | None = None,
+    sort: user_query.UserSort = "id",
+    count: pagination.CountMode = "exact",
+    user_filter: UserFilter = Depends(),
+    db: AsyncSession = Depends(deps.get_async_db),
+    current_user: User = Depends(deps.get_current_admin_user_async),
+) -> Any:
+    """
+    Retrieve users, filtered and sorted. (Admin only)
+
+    Pass ``next_cursor`` back as ``cursor``, with the same filters and sort,
+    to page by key instead of offset.
+    """
+    version = (
+        await db.execute(
+            select(
+                func.max(User.last_update_time),
+                func.max(User.id),
+                func.count().filter(User.is_deleted == False),
+                func.count().filter(User.is_active == True),
+            )
+        )
+    ).one()
+    etag = http_cache.collection_etag(
+        "users",
+        version,
+        skip,
+        limit,
+        cursor,
+        sort,
+        count,
+        user_filter.model_dump_json(exclude_none=True),
+    )
+    if http_cache.is_fresh(request, etag):
+        return http_cache.not_modified(etag)
+
+    columns = [getattr(User, name) for name in USER_RESPONSE_FIELDS]
+    query = select(*columns).where(
+        User.is_deleted == False, *user_query.filter_clauses(user_filter)
+    )
+    total = None
+    if count == "estimated":
+        total = await pagination.estimate_count_async(db, query)
+    if total is None and count != "none":
+        total = await db.scalar(select(func.count()).select_from(query.subquery()))
+
+    query = query.order_by(*user_query.order_by(sort))
+    if cursor is not None:
+        try:
+            query = query.where(user_query.after_cursor(sort, cursor))
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+    else:
+        query = query.offset(skip)
+    rows = (await db.execute(query.limit(limit))).all()
+    next_cursor = None
+    if rows and len(rows) == limit:
+        next_cursor = user_query.next_cursor(sort, rows[-1])
+    response = ORJSONResponse(
+        {
+            "items": [row._asdict() for row in rows],
+            "total": total,
+            "next_cursor": next_cursor,
+        }
+    )
+    http_cache.set_headers(response, etag)
+    return response
+
+
+@router.get("/{user_id}", response_model=UserResponse)
+@use_replica
+async def read_user_by_id(
+    user_id: int,
+    request: Request,
+    response: Response,
+    db: AsyncSession = Depends(deps.get_async_db),
+    current_user: User = Depends(deps.get_current_admin_user_async),
+) -> Any:
+    """
+    Get a specific user by id. (Admin only)
+    """
+    user = await db.scalar(select(User).where(User.id == user_id))
+    if not user:
+        raise HTTPException(status_code=404, detail="User not found")
+    etag = http_cache.user_etag(user)
+    if http_cache.is_fresh(request, etag):
+        return http_cache.not_modified(etag)
+    http_cache.set_headers(response, etag)
+    return user
+
+
+async def _update_other_user(
+    db: AsyncSession, user_id: int, current_user: User, verb: str, **values: Any
+) -> User:
+    """Apply ``values`` to another user in one UPDATE ... RETURNING."""
+    if user_id == current_user.id:
+        raise HTTPException(status_code=400, detail=f"Users cannot {verb} themselves")
+    allowed = [User.id == user_id]
+    # Avoid admins changing superadmins
+    if current_user.roles != UserRole.SUPERADMIN:
+        allowed.append(or_(User.roles.is_(None), User.roles != UserRole.SUPERADMIN))
+    user = await db.scalar(
+        update(User)
+        .where(*allowed)
+        .values(
+            **values,
+            last_updated_by=current_user.username,
+            last_update_time=datetime.now(timezone.utc),
+        )
+        .returning(User)
+    )
+    if user is None:
+        # Only a refused update pays for finding out why
+        if await db.scalar(select(User.id).where(User.id == user_id)) is None:
+            raise HTTPException(status_code=404, detail="User not found")
+        raise HTTPException(status_code=403, detail="Not enough privileges")
+    await db.commit()
+    principal_cache.invalidate(user_id)
+    return user
+
+
+@router.patch("/{user_id}/disable", response_model=UserResponse)
+@query_stats.query_budget(3)
+async def disable_user(
+    user_id: int,
+    db: AsyncSession = Depends(deps.get_async_db),
+    current_user: User = Depends(deps.get_current_admin_user_async),
+) -> Any:
+    """
+    Disable a user. (Admin only)
+    """
+    return await _update_other_user(
+        db, user_id, current_user, "disable", is_active=False
+    )
+
+
+@router.delete("/{user_id}", response_model=UserResponse)
+@query_stats.query_budget(3)
+async def soft_delete_user(
+    user_id: int,
+    db: AsyncSession = Depends(deps.get_async_db),
+    current_user: User = Depends(deps.get_current_admin_user_async),
+) -> Any:
+    """
+    Soft delete a user. (Admin only)
+    """
+    return await _update_other_user(
+        db, user_id, current_user, "delete", is_deleted=True, is_active=False
+    )
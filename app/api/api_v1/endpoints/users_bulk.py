@@ -0,0 +1,365 @@
+import csv
+import io
+from collections.abc import AsyncIterator, Iterator, Sequence
+from datetime import datetime, timezone
+from typing import Any, Literal
+
+import orjson
+from fastapi import APIRouter, Depends, Query, Request
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
+from pydantic import ValidationError
+from sqlalchemy import (
+    ARRAY,
+    Integer,
+    Row,
+    and_,
+    any_,
+    bindparam,
+    not_,
+    or_,
+    select,
+    update,
+)
+from sqlalchemy.orm import Session
+
+from app.api import deps
+from app.core import principal_cache, query_stats, security, user_query
+from app.core.db import SessionLocal, engine, insert_ignoring_conflicts
+from app.core.request_metrics import TimedRoute
+from app.models.user import User, UserRole
+from app.schemas.user import (
+    UserBulkAction,
+    UserBulkResponse,
+    UserBulkResult,
+    UserCreate,
+    UserImportResponse,
+    UserImportResult,
+)
+
+router = APIRouter(route_class=TimedRoute)
+
+# Rows validated, checked, hashed and inserted together in one transaction
+IMPORT_CHUNK_SIZE = 500
+
+# Rows fetched per server-side cursor round trip and written per chunk
+EXPORT_BATCH_SIZE = 1000
+EXPORT_COLUMNS = ("id", "email", "username", "is_active", "roles", "time_added")
+
+
+def _export_values(row: Row) -> list[Any]:
+    id_, email, username, is_active, roles, time_added = row
+    return [
+        id_,
+        email,
+        username,
+        is_active,
+        roles.value if roles is not None else None,
+        time_added.isoformat() if time_added is not None else None,
+    ]
+
+
+def _ndjson_chunk(rows: Sequence[Row]) -> bytes:
+    # orjson writes the enum and datetime columns itself
+    return b"".join(
+        orjson.dumps(row._asdict(), option=orjson.OPT_APPEND_NEWLINE) for row in rows
+    )
+
+
+def _csv_chunk(rows: Sequence[Row]) -> str:
+    buffer = io.StringIO()
+    csv.writer(buffer).writerows(_export_values(row) for row in rows)
+    return buffer.getvalue()
+
+
+def _stream_users(
+    file_format: Literal["ndjson", "csv"], include_deleted: bool
+) -> Iterator[str | bytes]:
+    if file_format == "csv":
+        buffer = io.StringIO()
+        csv.writer(buffer).writerow(EXPORT_COLUMNS)
+        yield buffer.getvalue()
+    render = _csv_chunk if file_format == "csv" else _ndjson_chunk
+
+    query = select(*(getattr(User, column) for column in EXPORT_COLUMNS))
+    if not include_deleted:
+        query = query.where(User.is_deleted == False)
+    # A dedicated connection outlives the request's session, and yield_per
+    # streams from a server-side cursor so memory stays flat
+    with engine.connect() as conn:
+        result = conn.execution_options(yield_per=EXPORT_BATCH_SIZE).execute(
+            query.order_by(User.id)
+        )
+        for rows in result.partitions():
+            yield render(rows)
+
+
+@router.get("/export")
+def export_users(
+    file_format: Literal["ndjson", "csv"] = Query("ndjson", alias="format"),
+    include_deleted: bool = False,
+    current_user: User = Depends(deps.get_current_admin_user),
+) -> Any:
+    """
+    Stream every user as NDJSON or CSV. (Admin only)
+    """
+    media_type = "text/csv" if file_format == "csv" else "application/x-ndjson"
+    return StreamingResponse(
+        _stream_users(file_format, include_deleted),
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="users.{file_format}"'},
+    )
+
+
+async def _iter_lines(request: Request) -> AsyncIterator[bytes]:
+    pending = b""
+    async for chunk in request.stream():
+        pending += chunk
+        *lines, pending = pending.split(b"\n")
+        for line in lines:
+            yield line
+    yield pending
+
+
+def _validation_detail(error: ValidationError) -> str:
+    return "; ".join(
+        f"{'.'.join(str(loc) for loc in err['loc']) or 'row'}: {err['msg']}"
+        for err in error.errors()
+    )
+
+
+def _import_chunk(
+    rows: list[tuple[int, UserCreate]],
+    added_by: str,
+    can_create_superadmin: bool,
+    seen_usernames: set[str],
+    seen_emails: set[str],
+) -> list[UserImportResult]:
+    results: dict[int, UserImportResult] = {}
+    with SessionLocal() as db:
+        # One query finds every clash with existing users in the chunk
+        usernames = {user_in.username for _, user_in in rows}
+        emails = {user_in.email for _, user_in in rows}
+        taken = db.execute(
+            select(User.username, User.email).where(
+                or_(User.username.in_(usernames), User.email.in_(emails))
+            )
+        ).all()
+        taken_usernames = seen_usernames | {username for username, _ in taken}
+        taken_emails = seen_emails | {email for _, email in taken}
+
+        accepted: list[tuple[int, UserCreate]] = []
+        for row, user_in in rows:
+            if user_in.username in taken_usernames or user_in.email in taken_emails:
+                detail = "The user with this user name or email already exists"
+            elif user_in.roles == UserRole.SUPERADMIN and not can_create_superadmin:
+                detail = "Not enough privileges to create Superadmin"
+            else:
+                taken_usernames.add(user_in.username)
+                taken_emails.add(user_in.email)
+                accepted.append((row, user_in))
+                continue
+            results[row] = UserImportResult(
+                row=row, status="error", username=user_in.username, detail=detail
+            )
+
+        if accepted:
+            hashes = security.get_password_hashes(
+                [user_in.password for _, user_in in accepted]
+            )
+            now = datetime.now(timezone.utc)
+            values = [
+                {
+                    "email": user_in.email,
+                    "username": user_in.username,
+                    "hashed_password": hashed_password,
+                    "roles": user_in.roles,
+                    "is_active": user_in.is_active,
+                    "added_by": added_by,
+                    "time_added": now,
+                }
+                for (_, user_in), hashed_password in zip(accepted, hashes, strict=True)
+            ]
+            # executemany with RETURNING, batched into multi-row INSERTs. A
+            # user created concurrently only skips its own row, which is then
+            # missing from the returned rows.
+            created = dict(
+                db.execute(
+                    insert_ignoring_conflicts(db, User).returning(
+                        User.username, User.id
+                    ),
+                    values,
+                ).all()
+            )
+            db.commit()
+            seen_usernames.update(user_in.username for _, user_in in accepted)
+            seen_emails.update(user_in.email for _, user_in in accepted)
+            for row, user_in in accepted:
+                id_ = created.get(user_in.username)
+                if id_ is None:
+                    results[row] = UserImportResult(
+                        row=row,
+                        status="error",
+                        username=user_in.username,
+                        detail="A conflicting user was created concurrently",
+                    )
+                else:
+                    results[row] = UserImportResult(
+                        row=row, status="created", id=id_, username=user_in.username
+                    )
+    return [results[row] for row, _ in rows]
+
+
+@router.post("/import", response_model=UserImportResponse)
+# Two statements per chunk, however many rows are sent
+@query_stats.query_budget(None)
+async def import_users(
+    request: Request,
+    current_user: User = Depends(deps.get_current_admin_user),
+) -> Any:
+    """
+    Create users from an NDJSON body of UserCreate objects. (Admin only)
+
+    Rows are handled in chunks; each row's outcome is reported separately.
+    """
+    added_by = current_user.username
+    can_create_superadmin = current_user.roles == UserRole.SUPERADMIN
+    seen_usernames: set[str] = set()
+    seen_emails: set[str] = set()
+    results: list[UserImportResult] = []
+    chunk: list[tuple[int, UserCreate]] = []
+
+    async def flush() -> None:
+        results.extend(
+            await run_in_threadpool(
+                _import_chunk,
+                chunk,
+                added_by,
+                can_create_superadmin,
+                seen_usernames,
+                seen_emails,
+            )
+        )
+        chunk.clear()
+
+    row = 0
+    async for line in _iter_lines(request):
+        if not line.strip():
+            continue
+        row += 1
+        try:
+            chunk.append((row, UserCreate.model_validate_json(line)))
+        except ValidationError as e:
+            results.append(
+                UserImportResult(row=row, status="error", detail=_validation_detail(e))
+            )
+        if len(chunk) >= IMPORT_CHUNK_SIZE:
+            await flush()
+    if chunk:
+        await flush()
+
+    results.sort(key=lambda result: result.row)
+    created = sum(result.status == "created" for result in results)
+    return {"created": created, "failed": len(results) - created, "results": results}
+
+
+def _bulk_update(
+    db: Session,
+    action: UserBulkAction,
+    current_user: User,
+    values: dict[str, Any],
+    verb: str,
+) -> dict[str, Any]:
+    if action.ids is not None:
+        ids = list(dict.fromkeys(action.ids))
+        # One array parameter on PostgreSQL, rather than one per id
+        if db.get_bind().dialect.name == "postgresql":
+            target = User.id == any_(bindparam("ids", ids, type_=ARRAY(Integer)))
+        else:
+            target = User.id.in_(ids)
+    else:
+        # Like GET /users, a filter only matches live users
+        target = and_(
+            User.is_deleted == False, *user_query.filter_clauses(action.filter)
+        )
+
+    # The single-user endpoints' checks, applied to the whole set
+    allowed = [User.id != current_user.id]
+    if current_user.roles != UserRole.SUPERADMIN:
+        allowed.append(or_(User.roles.is_(None), User.roles != UserRole.SUPERADMIN))
+
+    updated = db.scalars(
+        update(User)
+        .where(target, *allowed)
+        .values(
+            **values,
+            last_updated_by=current_user.username,
+            last_update_time=datetime.now(timezone.utc),
+        )
+        .returning(User.id)
+        .execution_options(synchronize_session=False)
+    ).all()
+    db.commit()
+    if updated:
+        principal_cache.invalidate(*updated)
+
+    # Only a batch that missed some ids needs a look at why
+    refused: dict[int, str] = {}
+    if action.ids is None or len(updated) < len(ids):
+        for (id_,) in db.execute(select(User.id).where(target, not_(and_(*allowed)))):
+            refused[id_] = (
+                f"Users cannot {verb} themselves"
+                if id_ == current_user.id
+                else "Not enough privileges"
+            )
+
+    results = [UserBulkResult(id=id_, status="updated") for id_ in updated]
+    results += [
+        UserBulkResult(id=id_, status="error", detail=detail)
+        for id_, detail in refused.items()
+    ]
+    if action.ids is not None:
+        done = set(updated) | refused.keys()
+        results += [
+            UserBulkResult(id=id_, status="error", detail="User not found")
+            for id_ in ids
+            if id_ not in done
+        ]
+    results.sort(key=lambda result: result.id)
+    return {
+        "updated": len(updated),
+        "failed": len(results) - len(updated),
+        "results": results,
+    }
+
+
+@router.post("/bulk/disable", response_model=UserBulkResponse)
+def bulk_disable_users(
+    action: UserBulkAction,
+    db: Session = Depends(deps.get_db),
+    current_user: User = Depends(deps.get_current_admin_user),
+) -> Any:
+    """
+    Disable the users with the given ids or matching a filter. (Admin only)
+
+    One UPDATE and one commit for the whole batch; each user's outcome is
+    reported separately.
+    """
+    return _bulk_update(db, action, current_user, {"is_active": False}, "disable")
+
+
+@router.post("/bulk/delete", response_model=UserBulkResponse)
+def bulk_soft_delete_users(
+    action: UserBulkAction,
+    db: Session = Depends(deps.get_db),
+    current_user: User = Depends(deps.get_current_admin_user),
+) -> Any:
+    """
+    Soft delete the users with the given ids or matching a filter. (Admin only)
+
+    One UPDATE and one commit for the whole batch; each user's outcome is
+    reported separately.
+    """
+    return _bulk_update(
+        db, action, current_user, {"is_deleted": True, "is_active": False}, "delete"
+    )
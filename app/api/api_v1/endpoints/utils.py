@@ -4,11 +4,12 @@ from fastapi import APIRouter, Depends
 from pydantic.networks import EmailStr
 
 from app.api import deps
+from app.core.request_metrics import TimedRoute
 from app.models.user import User
 from app.schemas.msg import Msg
 from app.utils.email import send_test_email
 
-router = APIRouter()
+router = APIRouter(route_class=TimedRoute)
 
 
 @router.post("/test-email/", response_model=Msg, status_code=201)
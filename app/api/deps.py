@@ -1,38 +1,106 @@
-from collections.abc import Generator
+from collections.abc import AsyncGenerator, Generator
 
 import jwt
-from fastapi import Depends, HTTPException, status
+from fastapi import Depends, HTTPException, Request, status
 from fastapi.security import OAuth2PasswordBearer
-from pydantic import ValidationError
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
-from app.core import security
+from app.core import principal_cache, profiling, rate_limit, security
 from app.core.config import settings
-from app.core.db import SessionLocal
+from app.core.db import (
+    AsyncSessionLocal,
+    SessionLocal,
+    reads_from_replica,
+    replica_for,
+)
 from app.models.user import User, UserRole
-from app.schemas.token import TokenPayload
 
 reuseable_oauth2 = OAuth2PasswordBearer(
     tokenUrl=f"{settings.API_V1_STR}/auth/login/access-token"
 )
 
 
-def get_db() -> Generator[Session, None, None]:
+def get_db(request: Request) -> Generator[Session, None, None]:
+    replica = replica_for(request.scope)
     try:
-        db = SessionLocal()
+        db = SessionLocal(replica=replica.engine if replica else None)
         yield db
     finally:
         db.close()
 
 
-def get_current_user(
-    db: Session = Depends(get_db), token: str = Depends(reuseable_oauth2)
-) -> User:
+def _client_ip(request: Request) -> str:
+    # Behind a proxy this is only the client's address when uvicorn runs
+    # with --proxy-headers and the proxy in --forwarded-allow-ips
+    return request.client.host if request.client else "unknown"
+
+
+# The rate limit dependencies go in the route's ``dependencies``, which
+# FastAPI resolves before the endpoint's own, so a rejected request never
+# opens a database session or hashes a password.
+
+
+async def rate_limit_login(request: Request) -> None:
+    # The form has already been parsed for the endpoint; this is the cached copy
+    form = await request.form()
+    username = str(form.get("username", "")).lower()
+    window = settings.RATE_LIMIT_WINDOW_SECONDS
+    await rate_limit.check(
+        [
+            (
+                f"login:ip:{_client_ip(request)}",
+                settings.RATE_LIMIT_LOGIN_PER_IP,
+                window,
+            ),
+            (
+                f"login:username:{username}",
+                settings.RATE_LIMIT_LOGIN_PER_USERNAME,
+                window,
+            ),
+        ]
+    )
+
+
+async def rate_limit_refresh(request: Request) -> None:
+    await rate_limit.check(
+        [
+            (
+                f"refresh:ip:{_client_ip(request)}",
+                settings.RATE_LIMIT_REFRESH_PER_IP,
+                settings.RATE_LIMIT_WINDOW_SECONDS,
+            )
+        ]
+    )
+
+
+async def rate_limit_recovery(request: Request) -> None:
+    email = request.path_params["email"].lower()
+    window = settings.RATE_LIMIT_RECOVERY_WINDOW_SECONDS
+    await rate_limit.check(
+        [
+            (
+                f"recovery:ip:{_client_ip(request)}",
+                settings.RATE_LIMIT_RECOVERY_PER_IP,
+                window,
+            ),
+            (f"recovery:email:{email}", settings.RATE_LIMIT_RECOVERY_PER_EMAIL, window),
+        ]
+    )
+
+
+async def get_async_db(request: Request) -> AsyncGenerator[AsyncSession, None]:
+    replica = replica_for(request.scope)
+    async with AsyncSessionLocal(
+        replica=replica.async_engine.sync_engine if replica else None
+    ) as db:
+        yield db
+
+
+def _get_access_token_subject(token: str) -> int:
     try:
-        payload = jwt.decode(
-            token, settings.SECRET_KEY, algorithms=[security.ALGORITHM]
-        )
-        token_data = TokenPayload(**payload)
+        token_data = security.decode_token(token)
 
         # Avoid using refresh token as access token
         if token_data.refresh:
@@ -40,7 +108,7 @@ def get_current_user(
                 status_code=status.HTTP_401_UNAUTHORIZED,
                 detail="Could not validate credentials",
             )
-    except (jwt.PyJWTError, ValidationError):
+    except jwt.PyJWTError:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Could not validate credentials",
@@ -50,35 +118,102 @@ def get_current_user(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Could not validate credentials",
         )
-    user = db.query(User).filter(User.id == int(token_data.sub)).first()
+    return int(token_data.sub)
+
+
+def _check_active(user: User) -> User:
+    if not user.is_active or user.is_deleted:
+        raise HTTPException(status_code=400, detail="Inactive user")
+    return user
+
+
+def _check_admin(user: User) -> User:
+    if user.roles not in [UserRole.ADMIN, UserRole.SUPERADMIN]:
+        raise HTTPException(
+            status_code=403, detail="The user doesn't have enough privileges"
+        )
+    return user
+
+
+def _check_superadmin(user: User) -> User:
+    if user.roles != UserRole.SUPERADMIN:
+        raise HTTPException(
+            status_code=403, detail="The user doesn't have enough privileges"
+        )
+    return user
+
+
+def get_current_user(
+    db: Session = Depends(get_db), token: str = Depends(reuseable_oauth2)
+) -> User:
+    user_id = _get_access_token_subject(token)
+    user = principal_cache.get(user_id)
+    if user is not None:
+        # Attaching does not touch the database; it only lets endpoints
+        # modify and commit the user like a freshly loaded row
+        db.add(user)
+        profiling.note_user(user)
+        return user
+    user = db.query(User).filter(User.id == user_id).first()
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
+    # A replica's copy can predate the write that invalidated the entry
+    if not reads_from_replica(db):
+        principal_cache.put(user)
+    profiling.note_user(user)
     return user
 
 
 def get_current_active_user(
     current_user: User = Depends(get_current_user),
 ) -> User:
-    if not current_user.is_active or current_user.is_deleted:
-        raise HTTPException(status_code=400, detail="Inactive user")
-    return current_user
+    return _check_active(current_user)
 
 
 def get_current_admin_user(
     current_user: User = Depends(get_current_active_user),
 ) -> User:
-    if current_user.roles not in [UserRole.ADMIN, UserRole.SUPERADMIN]:
-        raise HTTPException(
-            status_code=403, detail="The user doesn't have enough privileges"
-        )
-    return current_user
+    return _check_admin(current_user)
 
 
 def get_current_superadmin_user(
     current_user: User = Depends(get_current_active_user),
 ) -> User:
-    if current_user.roles != UserRole.SUPERADMIN:
-        raise HTTPException(
-            status_code=403, detail="The user doesn't have enough privileges"
-        )
-    return current_user
+    return _check_superadmin(current_user)
+
+
+async def get_current_user_async(
+    db: AsyncSession = Depends(get_async_db), token: str = Depends(reuseable_oauth2)
+) -> User:
+    user_id = _get_access_token_subject(token)
+    user = principal_cache.get(user_id)
+    if user is not None:
+        db.add(user)
+        profiling.note_user(user)
+        return user
+    user = await db.scalar(select(User).where(User.id == user_id))
+    if not user:
+        raise HTTPException(status_code=404, detail="User not found")
+    # A replica's copy can predate the write that invalidated the entry
+    if not reads_from_replica(db):
+        principal_cache.put(user)
+    profiling.note_user(user)
+    return user
+
+
+async def get_current_active_user_async(
+    current_user: User = Depends(get_current_user_async),
+) -> User:
+    return _check_active(current_user)
+
+
+async def get_current_admin_user_async(
+    current_user: User = Depends(get_current_active_user_async),
+) -> User:
+    return _check_admin(current_user)
+
+
+async def get_current_superadmin_user_async(
+    current_user: User = Depends(get_current_active_user_async),
+) -> User:
+    return _check_superadmin(current_user)
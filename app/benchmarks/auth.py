@@ -0,0 +1,54 @@
+"""Compare per-request token verification cost with and without the cache.
+
+uv run python -m app.benchmarks.auth --iterations 100000
+"""
+
+import argparse
+import time
+from collections.abc import Callable
+
+import jwt
+
+from app.core import security
+from app.core.config import settings
+from app.schemas.token import TokenPayload
+
+
+def baseline(token: str) -> TokenPayload:
+    payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[security.ALGORITHM])
+    return TokenPayload(**payload)
+
+
+def uncached(token: str) -> security.TokenClaims:
+    security._token_cache.clear()
+    return security.decode_token(token)
+
+
+def timeit(fn: Callable[[str], object], token: str, iterations: int) -> float:
+    start = time.perf_counter()
+    for _ in range(iterations):
+        fn(token)
+    return (time.perf_counter() - start) / iterations
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--iterations", type=int, default=50_000)
+    args = parser.parse_args()
+
+    token = security.create_access_token(1)
+    cases = [
+        ("jwt.decode + TokenPayload", baseline),
+        ("decode_token, cache miss", uncached),
+        ("decode_token, cache hit", security.decode_token),
+    ]
+    reference = None
+    print(f"{'path':<30} {'us/request':>12} {'speedup':>9}")
+    for name, fn in cases:
+        per_call = timeit(fn, token, args.iterations)
+        reference = reference or per_call
+        print(f"{name:<30} {per_call * 1e6:>12.2f} {reference / per_call:>8.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,56 @@
+"""Compare email renders per second with and without the compiled-MJML cache.
+
+uv run python -m app.benchmarks.email_templates --seconds 3
+"""
+
+import argparse
+import time
+from collections.abc import Callable
+
+from mjml import mjml_to_html
+
+from app.utils.email import env, render_email_template
+
+TEMPLATES = {
+    "reset_password.mjml": {
+        "email": "user@example.com",
+        "link": "http://localhost:3000/reset-password?token=abc",
+    },
+    "new_account.mjml": {
+        "username": "user",
+        "dashboard_link": "http://localhost:3000/dashboard",
+    },
+}
+
+
+def render_uncached(template_name: str, **kwargs) -> str:
+    mjml_content = env.get_template(template_name).render(**kwargs)
+    return mjml_to_html(mjml_content).html
+
+
+def measure(render: Callable[..., str], template_name: str, seconds: float) -> float:
+    count = 0
+    start = time.perf_counter()
+    while (elapsed := time.perf_counter() - start) < seconds:
+        render(template_name, **TEMPLATES[template_name])
+        count += 1
+    return count / elapsed
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--seconds", type=float, default=2.0)
+    args = parser.parse_args()
+
+    print(f"{'template':<22} {'uncached/s':>12} {'cached/s':>12} {'speedup':>9}")
+    for template_name in TEMPLATES:
+        uncached = measure(render_uncached, template_name, args.seconds)
+        cached = measure(render_email_template, template_name, args.seconds)
+        print(
+            f"{template_name:<22} {uncached:>12.1f} {cached:>12.1f} "
+            f"{cached / uncached:>8.1f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
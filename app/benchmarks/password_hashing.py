@@ -0,0 +1,77 @@
+"""Report password hashes per second for each scheme and cost on this host.
+
+uv run python -m app.benchmarks.password_hashing --bcrypt-rounds 10 12 14
+"""
+
+import argparse
+import time
+
+from passlib.exc import MissingBackendError
+from passlib.hash import argon2, bcrypt
+
+from app.core.config import settings
+
+PASSWORD = "correct horse battery staple"
+
+
+def measure(handler, seconds: float) -> tuple[int, float]:
+    """Hash repeatedly for at least ``seconds`` and return (count, elapsed)."""
+    count = 0
+    start = time.perf_counter()
+    while True:
+        handler.hash(PASSWORD)
+        count += 1
+        elapsed = time.perf_counter() - start
+        if elapsed >= seconds:
+            return count, elapsed
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--bcrypt-rounds", type=int, nargs="*", default=[settings.BCRYPT_ROUNDS]
+    )
+    parser.add_argument(
+        "--argon2-time-cost", type=int, nargs="*", default=[settings.ARGON2_TIME_COST]
+    )
+    parser.add_argument(
+        "--argon2-memory-cost",
+        type=int,
+        nargs="*",
+        default=[settings.ARGON2_MEMORY_COST],
+        help="KiB",
+    )
+    parser.add_argument("--seconds", type=float, default=2.0)
+    args = parser.parse_args()
+
+    cases = [
+        (f"bcrypt rounds={rounds}", bcrypt.using(rounds=rounds))
+        for rounds in args.bcrypt_rounds
+    ]
+    cases += [
+        (
+            f"argon2id t={time_cost} m={memory_cost}KiB "
+            f"p={settings.ARGON2_PARALLELISM}",
+            argon2.using(
+                type="ID",
+                rounds=time_cost,
+                memory_cost=memory_cost,
+                parallelism=settings.ARGON2_PARALLELISM,
+            ),
+        )
+        for time_cost in args.argon2_time_cost
+        for memory_cost in args.argon2_memory_cost
+    ]
+
+    print(f"{'scheme':<40} {'hashes/s':>10} {'ms/hash':>10}")
+    for name, handler in cases:
+        try:
+            count, elapsed = measure(handler, args.seconds)
+        except MissingBackendError:
+            print(f"{name:<40} {'skipped (install argon2-cffi)':>21}")
+            continue
+        print(f"{name:<40} {count / elapsed:>10.2f} {elapsed / count * 1000:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
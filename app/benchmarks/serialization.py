@@ -0,0 +1,105 @@
+"""Compare serialised users per second for the GET /users response paths.
+
+uv run python -m app.benchmarks.serialization --page-size 100 --seconds 2
+"""
+
+import argparse
+import time
+from collections.abc import Callable
+from datetime import datetime, timezone
+from typing import Any
+
+from fastapi.responses import JSONResponse, ORJSONResponse
+from pydantic import TypeAdapter
+from sqlalchemy import Row, create_engine, insert, select
+from sqlalchemy.orm import Session
+
+from app.models.base import Base
+from app.models.user import User, UserRole
+from app.schemas.user import USER_RESPONSE_FIELDS, UserListResponse
+
+adapter = TypeAdapter(UserListResponse)
+
+
+def load_page(count: int) -> tuple[list[User], list[Row]]:
+    """Return one page of users as ORM objects and as the list endpoint's rows."""
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(engine)
+    now = datetime.now(timezone.utc)
+    with Session(engine) as db:
+        db.execute(
+            insert(User),
+            [
+                {
+                    "email": f"user{i}@example.com",
+                    "username": f"user{i}",
+                    "hashed_password": "x" * 60,
+                    "roles": UserRole.USER,
+                    "time_added": now,
+                }
+                for i in range(count)
+            ],
+        )
+        db.commit()
+        users = db.scalars(select(User).order_by(User.id)).all()
+        columns = [getattr(User, name) for name in USER_RESPONSE_FIELDS]
+        rows = db.execute(select(*columns).order_by(User.id)).all()
+        db.expunge_all()
+    return list(users), list(rows)
+
+
+def model_path(users: list[User]) -> bytes:
+    # What FastAPI does with a response_model: validate from attributes,
+    # dump to JSON-compatible data, then encode
+    content = {"items": users, "total": len(users), "next_cursor": None}
+    value = adapter.validate_python(content, from_attributes=True)
+    return JSONResponse(adapter.dump_python(value, mode="json")).body
+
+
+def model_path_orjson(users: list[User]) -> bytes:
+    content = {"items": users, "total": len(users), "next_cursor": None}
+    value = adapter.validate_python(content, from_attributes=True)
+    return ORJSONResponse(adapter.dump_python(value, mode="json")).body
+
+
+def row_path(rows: list[Row]) -> bytes:
+    content = {
+        "items": [row._asdict() for row in rows],
+        "total": len(rows),
+        "next_cursor": None,
+    }
+    return ORJSONResponse(content).body
+
+
+def measure(render: Callable[[Any], bytes], page: Any, seconds: float) -> float:
+    """Return users serialised per second."""
+    count = 0
+    start = time.perf_counter()
+    while (elapsed := time.perf_counter() - start) < seconds:
+        render(page)
+        count += len(page)
+    return count / elapsed
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--page-size", type=int, default=100)
+    parser.add_argument("--seconds", type=float, default=2.0)
+    args = parser.parse_args()
+
+    users, rows = load_page(args.page_size)
+    cases = [
+        ("response_model + json", model_path, users),
+        ("response_model + orjson", model_path_orjson, users),
+        ("row mappings + orjson", row_path, rows),
+    ]
+    reference = None
+    print(f"{'path':<26} {'users/s':>12} {'speedup':>9}")
+    for name, render, page in cases:
+        per_second = measure(render, page, args.seconds)
+        reference = reference or per_second
+        print(f"{name:<26} {per_second:>12.0f} {per_second / reference:>8.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,168 @@
+"""Time GET /users filter and sort queries on a seeded table and show their plans.
+
+uv run python -m app.benchmarks.user_search --database-url postgresql://... --rows 1000000
+"""
+
+import argparse
+import random
+import statistics
+import time
+from datetime import datetime, timedelta
+from typing import Any
+
+from sqlalchemy import Engine, Select, create_engine, func, insert, select
+
+from app.core import user_query
+from app.core.db import _sync_url
+from app.core.pagination import Explain
+from app.models.base import Base
+from app.models.user import User, UserRole
+from app.schemas.user import USER_RESPONSE_FIELDS, UserFilter
+
+SEED_BATCH_SIZE = 10_000
+NAMES = ("alice", "bob", "carol", "dave", "erin", "frank", "grace", "heidi")
+DOMAINS = ("example.com", "example.org", "corp.example.net")
+START = datetime(2023, 1, 1)
+SPAN = timedelta(days=3 * 365)
+
+
+def seed(engine: Engine, rows: int) -> None:
+    """Fill the users table with ``rows`` users, unless it already has them."""
+    with engine.begin() as conn:
+        if engine.dialect.name == "postgresql":
+            conn.exec_driver_sql("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+        Base.metadata.create_all(conn)
+        if conn.scalar(select(func.count()).select_from(User)) == rows:
+            return
+        conn.execute(User.__table__.delete())
+
+    rng = random.Random(0)
+    step = SPAN / rows
+    for start in range(0, rows, SEED_BATCH_SIZE):
+        batch = []
+        for i in range(start, min(start + SEED_BATCH_SIZE, rows)):
+            name = rng.choice(NAMES)
+            if i % 1000 == 0:
+                roles = UserRole.SUPERADMIN
+            elif i % 50 == 0:
+                roles = UserRole.ADMIN
+            else:
+                roles = UserRole.USER
+            batch.append(
+                {
+                    "username": f"{name}{i}",
+                    "email": f"{name}.{i}@{rng.choice(DOMAINS)}",
+                    "hashed_password": "x" * 60,
+                    "roles": roles,
+                    "is_active": i % 10 != 0,
+                    "is_deleted": i % 20 == 0,
+                    "time_added": START + step * i,
+                    "last_update_time": START + step * i,
+                }
+            )
+        with engine.begin() as conn:
+            conn.execute(insert(User), batch)
+        print(f"seeded {min(start + SEED_BATCH_SIZE, rows)}/{rows}", end="\r")
+    print()
+    with engine.begin() as conn:
+        conn.exec_driver_sql(
+            "ANALYZE users" if engine.dialect.name == "postgresql" else "ANALYZE"
+        )
+
+
+def page_query(
+    user_filter: UserFilter, sort: user_query.UserSort, limit: int, cursor: str | None
+) -> Select:
+    # The query read_users runs for one page
+    columns = [getattr(User, name) for name in USER_RESPONSE_FIELDS]
+    query = (
+        select(*columns)
+        .where(User.is_deleted == False, *user_query.filter_clauses(user_filter))
+        .order_by(*user_query.order_by(sort))
+    )
+    if cursor is not None:
+        query = query.where(user_query.after_cursor(sort, cursor))
+    return query.limit(limit)
+
+
+def _pg_nodes(plan: dict[str, Any]) -> list[str]:
+    node = plan["Node Type"]
+    if "Index Name" in plan:
+        node += f" {plan['Index Name']}"
+    return [node] + [n for child in plan.get("Plans", []) for n in _pg_nodes(child)]
+
+
+def explain(engine: Engine, query: Select) -> tuple[str, bool]:
+    """The plan in one line, and whether it reads the whole users table."""
+    with engine.connect() as conn:
+        if engine.dialect.name == "postgresql":
+            plan = conn.execute(Explain(query, "EXPLAIN (FORMAT JSON)")).scalar_one()
+            nodes = _pg_nodes(plan[0]["Plan"])
+            return " > ".join(nodes), "Seq Scan" in nodes
+        details = [
+            row[-1] for row in conn.execute(Explain(query, "EXPLAIN QUERY PLAN"))
+        ]
+        return "; ".join(details), "SCAN users" in details
+
+
+def measure(engine: Engine, query: Select, repeat: int) -> float:
+    """Median milliseconds to fetch the page."""
+    timings = []
+    with engine.connect() as conn:
+        for _ in range(repeat):
+            start = time.perf_counter()
+            conn.execute(query).all()
+            timings.append((time.perf_counter() - start) * 1000)
+    return statistics.median(timings)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--database-url", default="sqlite:///./user_search_benchmark.db"
+    )
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--page-size", type=int, default=100)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    engine = create_engine(_sync_url(args.database_url))
+    seed(engine, args.rows)
+
+    recent = START + SPAN - timedelta(days=30)
+    cases: list[tuple[str, UserFilter, user_query.UserSort, bool]] = [
+        ("all, by id", UserFilter(), "id", False),
+        ("all, by id, next page", UserFilter(), "id", True),
+        ("role=admin", UserFilter(roles=UserRole.ADMIN), "id", False),
+        ("is_active=false", UserFilter(is_active=False), "id", False),
+        ("all, newest first", UserFilter(), "-time_added", False),
+        ("all, newest first, next page", UserFilter(), "-time_added", True),
+        ("added in last 30 days", UserFilter(added_after=recent), "time_added", False),
+        ("all, by username", UserFilter(), "username", False),
+        ("username prefix", UserFilter(username_prefix="Grace12"), "id", False),
+        ("email prefix", UserFilter(email_prefix="heidi.99"), "id", False),
+        ("search substring", UserFilter(search="ol4242"), "id", False),
+    ]
+    scans = []
+    print(f"{'case':<30} {'ms':>9}  plan")
+    for name, user_filter, sort, next_page in cases:
+        cursor = None
+        if next_page:
+            with engine.connect() as conn:
+                rows = conn.execute(
+                    page_query(user_filter, sort, args.page_size, None)
+                ).all()
+            cursor = user_query.next_cursor(sort, rows[-1])
+        query = page_query(user_filter, sort, args.page_size, cursor)
+        plan, full_scan = explain(engine, query)
+        if full_scan:
+            scans.append(name)
+        print(f"{name:<30} {measure(engine, query, args.repeat):>9.2f}  {plan}")
+    if scans:
+        # On SQLite, a scan sorted by id walks the table in rowid order and
+        # stops at the page size, like an index scan
+        print(f"\nTable scans: {', '.join(scans)}")
+
+
+if __name__ == "__main__":
+    main()
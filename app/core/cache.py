@@ -0,0 +1,100 @@
+import json
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Protocol
+
+
+class CacheBackend(Protocol):
+    def get(self, key: str) -> Any | None: ...
+
+    def set(self, key: str, value: Any) -> None: ...
+
+    def delete(self, *keys: str) -> None: ...
+
+
+class MemoryCache:
+    """In-process TTL cache evicting the least recently used entry when full."""
+
+    def __init__(self, ttl: float, max_size: int) -> None:
+        self.ttl = ttl
+        self.max_size = max_size
+        self._data: OrderedDict[str, tuple[float, Any]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Any | None:
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at <= time.monotonic():
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: Any) -> None:
+        with self._lock:
+            self._data[key] = (time.monotonic() + self.ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_size:
+                self._data.popitem(last=False)
+
+    def delete(self, *keys: str) -> None:
+        with self._lock:
+            for key in keys:
+                self._data.pop(key, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+
+class RedisCache:
+    """Cache shared by every worker, storing JSON values with a Redis TTL."""
+
+    def __init__(self, url: str, ttl: float, prefix: str) -> None:
+        try:
+            import redis
+        except ImportError as e:
+            raise RuntimeError(
+                "The redis cache backend needs the 'redis' extra installed"
+            ) from e
+        self.ttl = ttl
+        self.prefix = prefix
+        self._client = redis.Redis.from_url(url)
+
+    def get(self, key: str) -> Any | None:
+        raw = self._client.get(self.prefix + key)
+        return json.loads(raw) if raw is not None else None
+
+    def set(self, key: str, value: Any) -> None:
+        self._client.set(self.prefix + key, json.dumps(value), px=int(self.ttl * 1000))
+
+    def delete(self, *keys: str) -> None:
+        if keys:
+            self._client.delete(*(self.prefix + key for key in keys))
+
+
+class NullCache:
+    def get(self, key: str) -> Any | None:
+        return None
+
+    def set(self, key: str, value: Any) -> None:
+        pass
+
+    def delete(self, *keys: str) -> None:
+        pass
+
+
+def create_cache(
+    backend: str, *, ttl: float, max_size: int, redis_url: str | None, prefix: str
+) -> CacheBackend:
+    if backend == "memory":
+        return MemoryCache(ttl=ttl, max_size=max_size)
+    if backend == "redis":
+        if not redis_url:
+            raise RuntimeError("REDIS_URL must be set to use the redis cache backend")
+        return RedisCache(redis_url, ttl=ttl, prefix=prefix)
+    return NullCache()
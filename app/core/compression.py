@@ -0,0 +1,71 @@
+"""Response compression with gzip, or brotli when the client accepts it.
+
+Built on Starlette's GZip responders, so small bodies, already encoded
+responses and event streams are passed through the same way.
+"""
+
+from typing import Any
+
+from starlette.datastructures import Headers
+from starlette.middleware.gzip import GZipResponder, IdentityResponder
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+
+class BrotliResponder(IdentityResponder):
+    content_encoding = "br"
+
+    def __init__(self, app: ASGIApp, minimum_size: int, quality: int) -> None:
+        super().__init__(app, minimum_size)
+        self.compressor = _brotli().Compressor(quality=quality)
+
+    def apply_compression(self, body: bytes, *, more_body: bool) -> bytes:
+        if more_body:
+            # Flush so streamed chunks reach the client as they are produced
+            return self.compressor.process(body) + self.compressor.flush()
+        return self.compressor.process(body) + self.compressor.finish()
+
+
+def _brotli() -> Any:
+    try:
+        import brotli
+    except ImportError as e:
+        raise RuntimeError(
+            "Brotli compression needs the 'brotli' extra installed"
+        ) from e
+    return brotli
+
+
+class CompressionMiddleware:
+    def __init__(
+        self,
+        app: ASGIApp,
+        minimum_size: int,
+        gzip_level: int,
+        brotli_quality: int | None = None,
+    ) -> None:
+        self.app = app
+        self.minimum_size = minimum_size
+        self.gzip_level = gzip_level
+        self.brotli_quality = brotli_quality
+        if brotli_quality is not None:
+            # Fail at startup rather than on the first request
+            _brotli()
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        accepted = Headers(scope=scope).get("Accept-Encoding", "")
+        responder: ASGIApp
+        if self.brotli_quality is not None and "br" in accepted:
+            responder = BrotliResponder(
+                self.app, self.minimum_size, quality=self.brotli_quality
+            )
+        elif "gzip" in accepted:
+            responder = GZipResponder(
+                self.app, self.minimum_size, compresslevel=self.gzip_level
+            )
+        else:
+            responder = IdentityResponder(self.app, self.minimum_size)
+        await responder(scope, receive, send)
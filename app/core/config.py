@@ -1,4 +1,6 @@
+import os
 import secrets
+from typing import Literal
 
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
@@ -7,6 +9,102 @@ class Settings(BaseSettings):
     PROJECT_NAME: str = "framework-python Boilerplate"
     API_V1_STR: str = "/api/v1"
 
+    # Database
+    # "sync" serves the API from threadpool endpoints on the blocking engine,
+    # "async" from coroutine endpoints on the AsyncEngine.
+    DB_MODE: Literal["sync", "async"] = "sync"
+
+    # Connection pool, applied to both the sync and async engines
+    DB_POOL_SIZE: int = 5
+    DB_MAX_OVERFLOW: int = 10
+    DB_POOL_TIMEOUT: float = 30.0
+    # Seconds before a pooled connection is replaced, -1 to never recycle
+    DB_POOL_RECYCLE: int = 1800
+    DB_POOL_PRE_PING: bool = True
+    # Checkouts slower than this are logged as a pool saturation warning
+    DB_POOL_SLOW_CHECKOUT_SECONDS: float = 1.0
+
+    # Read replicas, as a JSON list of URLs, take the reads of endpoints
+    # marked with use_replica, in turn. Replicas are checked every
+    # DB_REPLICA_CHECK_SECONDS and skipped while unreachable or more than
+    # DB_REPLICA_MAX_LAG_SECONDS behind; writes always go to DATABASE_URL.
+    DB_REPLICA_URLS: list[str] = []
+    DB_REPLICA_MAX_LAG_SECONDS: float = 5.0
+    DB_REPLICA_CHECK_SECONDS: float = 5.0
+
+    # What the app does with the database on boot: "verify" waits for it and
+    # checks the schema is at the Alembic head, "migrate" also runs
+    # migrations and seeding (single-process development only), "skip"
+    # does neither. Production runs `python -m app.prestart` once instead.
+    DB_STARTUP_MODE: Literal["verify", "migrate", "skip"] = "verify"
+    DB_STARTUP_TIMEOUT_SECONDS: float = 30.0
+    DB_STARTUP_BACKOFF_SECONDS: float = 0.25
+    DB_STARTUP_BACKOFF_MAX_SECONDS: float = 5.0
+
+    # Production server (python -m app.server)
+    SERVER_HOST: str = "0.0.0.0"
+    SERVER_PORT: int = 8000
+    SERVER_WORKERS: int = os.cpu_count() or 1
+    # Fall back to the pure-Python implementations if these are not installed
+    SERVER_LOOP: Literal["uvloop", "asyncio", "auto"] = "uvloop"
+    SERVER_HTTP: Literal["httptools", "h11", "auto"] = "httptools"
+    # Longer than a load balancer's idle timeout, so it never reuses a
+    # connection the server has just closed
+    SERVER_KEEPALIVE_SECONDS: int = 75
+    SERVER_BACKLOG: int = 2048
+    # On SIGTERM, stop accepting and wait this long for in-flight requests
+    SERVER_GRACEFUL_SHUTDOWN_SECONDS: int = 30
+    SERVER_ACCESS_LOG: bool = True
+    # Threads per worker for sync endpoints; beyond DB_POOL_SIZE +
+    # DB_MAX_OVERFLOW the extra threads only queue for a connection
+    SERVER_THREADPOOL_SIZE: int = 40
+    # The auth and users routers run their sync endpoints on limiters of
+    # their own, so logins queued on password hashing cannot take the
+    # threads user reads need; the default limiter keeps the dependencies
+    THREADPOOL_AUTH_SIZE: int = 16
+    THREADPOOL_USERS_SIZE: int = 40
+    # Calls that wait longer than this for a thread are logged
+    THREADPOOL_SLOW_WAIT_SECONDS: float = 0.1
+
+    # Request metrics, served in Prometheus text format at /metrics. With
+    # several workers each writes its numbers to METRICS_MULTIPROC_DIR every
+    # METRICS_FLUSH_SECONDS and a scrape adds them up; app.server sets a
+    # temporary directory when none is given.
+    METRICS_ENABLED: bool = True
+    METRICS_MULTIPROC_DIR: str | None = None
+    METRICS_FLUSH_SECONDS: float = 5.0
+
+    # Per-request sampling profiler. PROFILING_SAMPLE_RATE of requests are
+    # profiled, plus admin requests that send PROFILING_HEADER with
+    # PROFILING_TOKEN as its value (never, while no token is set); the last
+    # PROFILING_MAX_PROFILES results are kept per worker process.
+    PROFILING_ENABLED: bool = False
+    PROFILING_SAMPLE_RATE: float = 0.0
+    PROFILING_HEADER: str = "X-Profile"
+    PROFILING_TOKEN: str | None = None
+    PROFILING_INTERVAL_SECONDS: float = 0.005
+    PROFILING_MAX_PROFILES: int = 50
+    PROFILING_MAX_STATEMENTS: int = 500
+
+    # SQL statements are counted per request and checked against the route's
+    # budget (QUERY_BUDGET_DEFAULT unless the endpoint sets its own); "warn"
+    # logs overruns, "raise" fails the request, for use in tests
+    QUERY_STATS_ENABLED: bool = True
+    QUERY_BUDGET_MODE: Literal["off", "warn", "raise"] = "warn"
+    QUERY_BUDGET_DEFAULT: int = 10
+    # The same statement this many times in one request is logged as an N+1
+    QUERY_REPEAT_THRESHOLD: int = 5
+    SLOW_QUERY_SECONDS: float = 0.5
+
+    # Responses of at least COMPRESSION_MINIMUM_SIZE bytes are compressed.
+    # Brotli is preferred when enabled and the client accepts it; it needs
+    # the optional brotli extra.
+    COMPRESSION_ENABLED: bool = True
+    COMPRESSION_MINIMUM_SIZE: int = 1000
+    COMPRESSION_GZIP_LEVEL: int = 6
+    COMPRESSION_BROTLI: bool = False
+    COMPRESSION_BROTLI_QUALITY: int = 4
+
     # First Superuser
     FIRST_SUPERUSER: str = "admin@example.com"
     FIRST_SUPERUSER_USERNAME: str = "admin"
@@ -20,6 +118,20 @@ class Settings(BaseSettings):
     SMTP_PASSWORD: str | None = None
     EMAILS_FROM_EMAIL: str | None = None
     EMAILS_FROM_NAME: str | None = None
+    SMTP_TIMEOUT: float = 10.0
+
+    # Outbound email is queued and sent by background workers over pooled
+    # SMTP connections; requests only wait for the enqueue
+    SMTP_POOL_SIZE: int = 2
+    # Idle connections older than this are probed with NOOP before reuse
+    SMTP_MAX_IDLE_SECONDS: float = 30.0
+    EMAIL_QUEUE_WORKERS: int = 2
+    EMAIL_QUEUE_MAX_SIZE: int = 1000
+    EMAIL_BATCH_SIZE: int = 20
+    EMAIL_MAX_RETRIES: int = 5
+    EMAIL_RETRY_BACKOFF_SECONDS: float = 1.0
+    # Recompile MJML templates when their file changes (for development)
+    EMAIL_TEMPLATES_AUTO_RELOAD: bool = False
 
     @property
     def emails_enabled(self) -> bool:
@@ -30,9 +142,51 @@ class Settings(BaseSettings):
     # 60 minutes * 24 hours * 8 days = 8 days
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 60 * 24 * 8
 
+    # New hashes use PASSWORD_HASH_SCHEME; hashes made with another scheme or
+    # cost are upgraded on the user's next successful login
+    PASSWORD_HASH_SCHEME: Literal["bcrypt", "argon2"] = "bcrypt"
+    BCRYPT_ROUNDS: int = 12
+    # argon2id needs the optional argon2-cffi backend
+    ARGON2_TIME_COST: int = 3
+    ARGON2_MEMORY_COST: int = 64 * 1024  # KiB
+    ARGON2_PARALLELISM: int = 4
+
+    # Password hashing runs on its own pool so it cannot starve the request
+    # threadpool; calls beyond workers + queue are rejected with a 503
+    PASSWORD_HASH_EXECUTOR: Literal["thread", "process"] = "thread"
+    PASSWORD_HASH_WORKERS: int = os.cpu_count() or 1
+    PASSWORD_HASH_MAX_QUEUE: int = 32
+
+    # Authenticated users are cached by id so most requests skip the lookup.
+    # "memory" is per worker process (invalidation does not reach other
+    # workers before the TTL); "redis" is shared through REDIS_URL.
+    PRINCIPAL_CACHE_BACKEND: Literal["memory", "redis", "none"] = "memory"
+    PRINCIPAL_CACHE_TTL_SECONDS: float = 60.0
+    PRINCIPAL_CACHE_MAX_SIZE: int = 10_000
+    REDIS_URL: str | None = None
+
+    # Login, token refresh and password recovery allow so many attempts per
+    # window, per client IP and per username or email tried. Requests over
+    # the limit get a 429 before any database or password hashing work.
+    # "memory" counts per worker process; "redis" shares counts through
+    # REDIS_URL, so the limits hold however many workers there are.
+    RATE_LIMIT_BACKEND: Literal["memory", "redis", "none"] = "memory"
+    RATE_LIMIT_MAX_KEYS: int = 100_000
+    RATE_LIMIT_WINDOW_SECONDS: float = 60.0
+    RATE_LIMIT_LOGIN_PER_IP: int = 20
+    RATE_LIMIT_LOGIN_PER_USERNAME: int = 5
+    RATE_LIMIT_REFRESH_PER_IP: int = 30
+    RATE_LIMIT_RECOVERY_WINDOW_SECONDS: float = 3600.0
+    RATE_LIMIT_RECOVERY_PER_IP: int = 10
+    RATE_LIMIT_RECOVERY_PER_EMAIL: int = 3
+
     # Refresh Token
     REFRESH_TOKEN_EXPIRE_MINUTES: int = 60 * 24 * 30 * 6  # 6 months
 
+    # Verified tokens are cached by digest so reused tokens skip the HMAC check
+    JWT_CACHE_MAX_SIZE: int = 10_000
+    JWT_CACHE_TTL_SECONDS: float = 300.0
+
     model_config = SettingsConfigDict(
         env_file=".env", env_file_encoding="utf-8", extra="ignore"
     )
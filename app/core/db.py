@@ -1,12 +1,174 @@
 import os
+from collections.abc import Callable
+from typing import Any, TypeVar
+
+from sqlalchemy import Insert, create_engine
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.engine import Engine
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import (
+    AsyncEngine,
+    AsyncSession,
+    async_sessionmaker,
+    create_async_engine,
+)
+from sqlalchemy.orm import Session, sessionmaker
+from sqlalchemy.pool import Pool
+from starlette.types import Scope
+
+from app.core.config import settings
+from app.core.pool_stats import (
+    InstrumentedAsyncAdaptedQueuePool,
+    InstrumentedQueuePool,
+    PoolStats,
+)
+from app.core.replicas import Replica, ReplicaSet
+
+T = TypeVar("T")
+
+
+def _sync_url(url: str) -> str:
+    if url.startswith("postgresql://"):
+        return url.replace("postgresql://", "postgresql+psycopg://", 1)
+    return url
+
+
+def _async_url(url: str) -> str:
+    # psycopg 3 serves both engines; SQLite needs the aiosqlite driver
+    if url.startswith("sqlite://"):
+        return url.replace("sqlite://", "sqlite+aiosqlite://", 1)
+    return url
 
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker
 
 # Prefer DATABASE_URL for Postgres/SQLModel compatibility
-DATABASE_URL = os.environ.get("DATABASE_URL", "sqlite:///./test.db")
-if DATABASE_URL.startswith("postgresql://"):
-    DATABASE_URL = DATABASE_URL.replace("postgresql://", "postgresql+psycopg://", 1)
+DATABASE_URL = _sync_url(os.environ.get("DATABASE_URL", "sqlite:///./test.db"))
+ASYNC_DATABASE_URL = _async_url(DATABASE_URL)
+
+
+def _pool_options(url: str, poolclass: type[Pool]) -> dict[str, Any]:
+    # In-memory SQLite needs its single shared connection pool
+    if ":memory:" in url or "mode=memory" in url:
+        return {}
+    return {
+        "poolclass": poolclass,
+        "pool_size": settings.DB_POOL_SIZE,
+        "max_overflow": settings.DB_MAX_OVERFLOW,
+        "pool_timeout": settings.DB_POOL_TIMEOUT,
+        "pool_recycle": settings.DB_POOL_RECYCLE,
+        "pool_pre_ping": settings.DB_POOL_PRE_PING,
+    }
+
+
+def _create_engines(url: str) -> tuple[Engine, AsyncEngine]:
+    sync_url = _sync_url(url)
+    async_url = _async_url(sync_url)
+    return (
+        create_engine(sync_url, **_pool_options(sync_url, InstrumentedQueuePool)),
+        create_async_engine(
+            async_url,
+            **_pool_options(async_url, InstrumentedAsyncAdaptedQueuePool),
+        ),
+    )
+
+
+class RoutingSession(Session):
+    """Session that sends reads to ``replica`` until it first writes.
+
+    Flushes and INSERT/UPDATE/DELETE statements always go to the primary.
+    From the first write on, reads do too, so a request reads its own
+    writes. Without a replica this is a plain primary session.
+    """
+
+    def __init__(self, *args: Any, replica: Engine | None = None, **kwargs: Any):
+        super().__init__(*args, **kwargs)
+        self.info["replica"] = replica
+
+    def get_bind(self, mapper=None, clause=None, **kw):
+        replica = self.info.get("replica")
+        if replica is not None:
+            if not self._flushing and not getattr(clause, "is_dml", False):
+                return replica
+            self.info["replica"] = None
+        return super().get_bind(mapper, clause=clause, **kw)
+
+
+def reads_from_replica(db: Session | AsyncSession) -> bool:
+    """Whether the session's reads still go to a replica."""
+    return db.info.get("replica") is not None
+
+
+# Dialects whose INSERT supports ON CONFLICT
+_INSERTS = {"postgresql": postgresql.insert, "sqlite": sqlite.insert}
+
+
+def insert_ignoring_conflicts(db: Session | AsyncSession, entity: Any) -> Insert:
+    """INSERT ... ON CONFLICT DO NOTHING; clashing rows are skipped, unreturned."""
+    return _INSERTS[db.get_bind().dialect.name](entity).on_conflict_do_nothing()
+
+
+def unique_violation(error: IntegrityError, *columns: str) -> str | None:
+    """Which of ``columns`` a unique index rejected, or None for other errors."""
+    # psycopg names the index; SQLite says "UNIQUE constraint failed: users.email"
+    diag = getattr(error.orig, "diag", None)
+    message = getattr(diag, "constraint_name", None) or str(error.orig)
+    return next(
+        (
+            column
+            for column in columns
+            if f"_{column}" in message or f".{column}" in message
+        ),
+        None,
+    )
+
+
+engine, async_engine = _create_engines(DATABASE_URL)
+# Sessions live for one request and every server-side value comes back through
+# RETURNING, so expiring on commit would only re-SELECT rows already in hand
+SessionLocal = sessionmaker(
+    class_=RoutingSession,
+    autocommit=False,
+    autoflush=False,
+    expire_on_commit=False,
+    bind=engine,
+)
+# Expired attributes cannot lazy-load outside the greenlet, so keep them loaded
+AsyncSessionLocal = async_sessionmaker(
+    bind=async_engine,
+    sync_session_class=RoutingSession,
+    autoflush=False,
+    expire_on_commit=False,
+)
+
+replicas = ReplicaSet(
+    [Replica(*_create_engines(url)) for url in settings.DB_REPLICA_URLS],
+    max_lag=settings.DB_REPLICA_MAX_LAG_SECONDS,
+    interval=settings.DB_REPLICA_CHECK_SECONDS,
+)
+
+
+def use_replica(endpoint: Callable[..., T]) -> Callable[..., T]:
+    """Serve the endpoint's reads, the principal lookup included, from a replica."""
+    endpoint._use_replica = True
+    return endpoint
+
+
+def replica_for(scope: Scope) -> Replica | None:
+    """A replica for the request's session, if its endpoint allows one."""
+    if not getattr(scope.get("endpoint"), "_use_replica", False):
+        return None
+    return replicas.pick()
+
 
-engine = create_engine(DATABASE_URL)
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+pool_stats = {
+    "sync": PoolStats("sync", settings.DB_POOL_SLOW_CHECKOUT_SECONDS),
+    "async": PoolStats("async", settings.DB_POOL_SLOW_CHECKOUT_SECONDS),
+}
+pool_stats["sync"].attach(engine.pool)
+pool_stats["async"].attach(async_engine.sync_engine.pool)
+for index, replica in enumerate(replicas.replicas):
+    for name, pool in (
+        (f"replica{index}-sync", replica.engine.pool),
+        (f"replica{index}-async", replica.async_engine.sync_engine.pool),
+    ):
+        pool_stats[name] = PoolStats(name, settings.DB_POOL_SLOW_CHECKOUT_SECONDS)
+        pool_stats[name].attach(pool)
@@ -0,0 +1,124 @@
+import asyncio
+import logging
+import threading
+import time
+from collections.abc import Callable, Sequence
+from concurrent.futures import Executor, Future, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Literal, TypeVar
+
+from app.core import request_metrics
+from app.core.metrics import Histogram
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+# bcrypt/argon2 calls take tens to hundreds of milliseconds
+HASH_BUCKETS = (0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+class PasswordHashPoolBusy(Exception):
+    """Raised when the hashing queue is full and the call was not accepted."""
+
+
+class PasswordHashPool:
+    """Size-limited executor for password hashing with queue back-pressure.
+
+    At most ``workers`` hashes run at once and at most ``max_queue`` more may
+    wait; anything beyond that is rejected with :class:`PasswordHashPoolBusy`
+    instead of piling up behind a login storm.
+    """
+
+    def __init__(
+        self, kind: Literal["thread", "process"], workers: int, max_queue: int
+    ) -> None:
+        self.kind = kind
+        self.workers = workers
+        self.max_queue = max_queue
+        self.latency = {
+            "hash": Histogram(HASH_BUCKETS),
+            "verify": Histogram(HASH_BUCKETS),
+        }
+        self.in_flight = 0
+        self.rejected = 0
+        self._executor: Executor | None = None
+        self._capacity = threading.Condition()
+
+    def _get_executor(self) -> Executor:
+        if self._executor is None:
+            if self.kind == "process":
+                self._executor = ProcessPoolExecutor(max_workers=self.workers)
+            else:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.workers, thread_name_prefix="password-hash"
+                )
+        return self._executor
+
+    def submit(
+        self, op: str, fn: Callable[..., T], *args: Any, wait: bool = False
+    ) -> "Future[T]":
+        """Queue a call, or raise PasswordHashPoolBusy if full and not ``wait``."""
+        with self._capacity:
+            while self.in_flight >= self.workers + self.max_queue:
+                if not wait:
+                    self.rejected += 1
+                    raise PasswordHashPoolBusy(
+                        f"Password hashing queue is full ({self.in_flight} pending)"
+                    )
+                self._capacity.wait()
+            self.in_flight += 1
+            executor = self._get_executor()
+        start = time.perf_counter()
+        try:
+            future = executor.submit(fn, *args)
+        except BaseException:
+            self._done(op, start)
+            raise
+        future.add_done_callback(lambda _: self._done(op, start))
+        return future
+
+    def _done(self, op: str, start: float) -> None:
+        self.latency[op].observe(time.perf_counter() - start)
+        with self._capacity:
+            self.in_flight -= 1
+            self._capacity.notify()
+
+    def run(self, op: str, fn: Callable[..., T], *args: Any) -> T:
+        with request_metrics.track("password_hash"):
+            return self.submit(op, fn, *args).result()
+
+    async def run_async(self, op: str, fn: Callable[..., T], *args: Any) -> T:
+        with request_metrics.track("password_hash"):
+            return await asyncio.wrap_future(self.submit(op, fn, *args))
+
+    def map(self, op: str, fn: Callable[..., T], items: Sequence[Any]) -> list[T]:
+        """Run ``fn`` over ``items`` for batch jobs.
+
+        Uses at most ``workers`` slots at a time and waits for capacity rather
+        than being rejected, leaving the queue to interactive requests.
+        """
+        results: list[T] = []
+        with request_metrics.track("password_hash"):
+            for start in range(0, len(items), self.workers):
+                futures = [
+                    self.submit(op, fn, item, wait=True)
+                    for item in items[start : start + self.workers]
+                ]
+                results.extend(future.result() for future in futures)
+        return results
+
+    def shutdown(self) -> None:
+        with self._capacity:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=True)
+
+    def snapshot(self) -> dict[str, Any]:
+        return {
+            "executor": self.kind,
+            "workers": self.workers,
+            "max_queue": self.max_queue,
+            "in_flight": self.in_flight,
+            "rejected": self.rejected,
+            "latency_seconds": {op: h.snapshot() for op, h in self.latency.items()},
+        }
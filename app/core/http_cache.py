@@ -0,0 +1,59 @@
+"""ETags and conditional GET for read endpoints.
+
+Tags are weak: they are derived from ``id`` and ``last_update_time`` rather
+than from the encoded body, so a request that matches can be answered with
+304 before the response is serialised.
+"""
+
+import hashlib
+from collections.abc import Sequence
+from datetime import datetime
+from typing import Any
+
+from fastapi import Request, Response
+
+from app.models.user import User
+
+# Authenticated data: browsers and proxies must revalidate before reuse
+CACHE_CONTROL = "private, no-cache"
+
+
+def _version(value: datetime | None) -> str:
+    return value.isoformat() if value is not None else "-"
+
+
+def user_etag(user: User) -> str:
+    return f'W/"user-{user.id}-{_version(user.last_update_time)}"'
+
+
+def collection_etag(name: str, version: Sequence[Any], *params: Any) -> str:
+    """Tag one page of a collection from its version and the query parameters."""
+    key = "|".join(
+        _version(part) if isinstance(part, datetime) else str(part)
+        for part in (*version, *params)
+    )
+    digest = hashlib.sha256(key.encode()).hexdigest()[:32]
+    return f'W/"{name}-{digest}"'
+
+
+def is_fresh(request: Request, etag: str) -> bool:
+    """True if the client's If-None-Match already names ``etag``."""
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    # Weak comparison: W/"x" and "x" name the same representation
+    opaque = etag.removeprefix("W/")
+    return any(tag.strip().removeprefix("W/") == opaque for tag in header.split(","))
+
+
+def set_headers(response: Response, etag: str) -> None:
+    response.headers["ETag"] = etag
+    response.headers["Cache-Control"] = CACHE_CONTROL
+
+
+def not_modified(etag: str) -> Response:
+    response = Response(status_code=304)
+    set_headers(response, etag)
+    return response
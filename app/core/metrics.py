@@ -0,0 +1,272 @@
+import bisect
+import json
+import os
+import threading
+from collections.abc import Iterable, Sequence
+from pathlib import Path
+from typing import Any, Literal
+
+# Latency buckets in seconds, from sub-millisecond lookups to pool timeouts
+DEFAULT_BUCKETS = (
+    0.001,
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+    30.0,
+)
+
+
+class Histogram:
+    """Thread-safe cumulative histogram with fixed upper bounds."""
+
+    def __init__(self, buckets: Sequence[float] = DEFAULT_BUCKETS) -> None:
+        self.buckets = tuple(sorted(buckets))
+        self._counts = [0] * (len(self.buckets) + 1)
+        self._sum = 0.0
+        self._count = 0
+        self._lock = threading.Lock()
+
+    def observe(self, value: float) -> None:
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            self._counts[index] += 1
+            self._sum += value
+            self._count += 1
+
+    def snapshot(self) -> dict[str, Any]:
+        with self._lock:
+            counts = list(self._counts)
+            total, count = self._sum, self._count
+        cumulative = 0
+        buckets = {}
+        for bound, bucket_count in zip(self.buckets, counts, strict=False):
+            cumulative += bucket_count
+            buckets[str(bound)] = cumulative
+        buckets["+Inf"] = count
+        return {"count": count, "sum": total, "buckets": buckets}
+
+
+class MetricFamily:
+    """Counter, gauge or histogram with one value per label combination."""
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        kind: Literal["counter", "gauge", "histogram"],
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+    ) -> None:
+        self.name = name
+        self.documentation = documentation
+        self.kind = kind
+        self.labelnames = tuple(labelnames)
+        self.buckets = buckets
+        self._values: dict[tuple[str, ...], Any] = {}
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Sequence[str]) -> tuple[str, ...]:
+        if len(labels) != len(self.labelnames):
+            raise ValueError(f"{self.name} takes labels {self.labelnames}")
+        return tuple(str(label) for label in labels)
+
+    def inc(self, *labels: str, amount: float = 1.0) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def dec(self, *labels: str, amount: float = 1.0) -> None:
+        self.inc(*labels, amount=-amount)
+
+    def observe(self, value: float, *labels: str) -> None:
+        key = self._key(labels)
+        histogram = self._values.get(key)
+        if histogram is None:
+            with self._lock:
+                histogram = self._values.setdefault(key, Histogram(self.buckets))
+        histogram.observe(value)
+
+    def snapshot(self) -> dict[str, Any]:
+        with self._lock:
+            values = list(self._values.items())
+        samples = [
+            [list(key), value.snapshot() if self.kind == "histogram" else value]
+            for key, value in values
+        ]
+        return {
+            "name": self.name,
+            "help": self.documentation,
+            "type": self.kind,
+            "labelnames": list(self.labelnames),
+            "samples": samples,
+        }
+
+
+class Registry:
+    def __init__(self) -> None:
+        self._families: dict[str, MetricFamily] = {}
+
+    def _register(self, family: MetricFamily) -> MetricFamily:
+        if family.name in self._families:
+            raise ValueError(f"Metric {family.name} is already registered")
+        self._families[family.name] = family
+        return family
+
+    def counter(
+        self, name: str, documentation: str, labelnames: Sequence[str] = ()
+    ) -> MetricFamily:
+        return self._register(MetricFamily(name, documentation, "counter", labelnames))
+
+    def gauge(
+        self, name: str, documentation: str, labelnames: Sequence[str] = ()
+    ) -> MetricFamily:
+        return self._register(MetricFamily(name, documentation, "gauge", labelnames))
+
+    def histogram(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+    ) -> MetricFamily:
+        return self._register(
+            MetricFamily(name, documentation, "histogram", labelnames, buckets)
+        )
+
+    def snapshot(self) -> list[dict[str, Any]]:
+        return [family.snapshot() for family in self._families.values()]
+
+
+registry = Registry()
+
+
+def merge_snapshots(snapshots: Iterable[list[dict[str, Any]]]) -> list[dict[str, Any]]:
+    """Add up registry snapshots taken in different worker processes."""
+    merged: dict[str, dict[str, Any]] = {}
+    values: dict[str, dict[tuple[str, ...], Any]] = {}
+    for snapshot in snapshots:
+        for family in snapshot:
+            name = family["name"]
+            if name not in merged:
+                merged[name] = {**family, "samples": []}
+                values[name] = {}
+            for labels, value in family["samples"]:
+                key = tuple(labels)
+                current = values[name].get(key)
+                if current is None:
+                    values[name][key] = value
+                elif family["type"] == "histogram":
+                    values[name][key] = {
+                        "count": current["count"] + value["count"],
+                        "sum": current["sum"] + value["sum"],
+                        "buckets": {
+                            bound: current["buckets"].get(bound, 0) + count
+                            for bound, count in value["buckets"].items()
+                        },
+                    }
+                else:
+                    values[name][key] = current + value
+    for name, family in merged.items():
+        family["samples"] = [[list(key), value] for key, value in values[name].items()]
+    return list(merged.values())
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", r"\\").replace("\n", r"\n").replace('"', r"\"")
+
+
+def _labels(names: Sequence[str], values: Sequence[str]) -> str:
+    if not names:
+        return ""
+    pairs = ",".join(
+        f'{name}="{_escape(value)}"' for name, value in zip(names, values, strict=True)
+    )
+    return "{" + pairs + "}"
+
+
+def render_prometheus(snapshot: list[dict[str, Any]]) -> str:
+    """Render a registry snapshot in the Prometheus text exposition format."""
+    lines = []
+    for family in snapshot:
+        name, names = family["name"], family["labelnames"]
+        lines.append(f"# HELP {name} {_escape(family['help'])}")
+        lines.append(f"# TYPE {name} {family['type']}")
+        for labels, value in family["samples"]:
+            if family["type"] != "histogram":
+                lines.append(f"{name}{_labels(names, labels)} {value}")
+                continue
+            for bound, count in value["buckets"].items():
+                bucket_labels = _labels([*names, "le"], [*labels, bound])
+                lines.append(f"{name}_bucket{bucket_labels} {count}")
+            lines.append(f"{name}_sum{_labels(names, labels)} {value['sum']}")
+            lines.append(f"{name}_count{_labels(names, labels)} {value['count']}")
+    return "\n".join(lines) + "\n"
+
+
+class MultiprocessStore:
+    """Share registry snapshots between worker processes through a directory.
+
+    Each worker writes its own ``<pid>.json``; whichever worker serves a
+    scrape adds up every file, so the result covers all of them however the
+    scrape was routed. Files from exited workers stay, keeping their
+    counters monotonic until the directory is cleared on the next start.
+    """
+
+    def __init__(self, directory: str, registry: Registry, interval: float) -> None:
+        self.directory = Path(directory)
+        self.registry = registry
+        self.interval = interval
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    @property
+    def path(self) -> Path:
+        return self.directory / f"{os.getpid()}.json"
+
+    def flush(self) -> None:
+        self.directory.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_suffix(".tmp")
+        tmp.write_text(json.dumps(self.registry.snapshot()))
+        os.replace(tmp, self.path)
+
+    def collect(self) -> list[dict[str, Any]]:
+        self.flush()
+        snapshots = []
+        for path in self.directory.glob("*.json"):
+            try:
+                snapshots.append(json.loads(path.read_text()))
+            except (OSError, ValueError):
+                # Removed or half-written by another process; skip this scrape
+                continue
+        return merge_snapshots(snapshots)
+
+    def start(self) -> None:
+        self._stop.clear()
+        self._thread = threading.Thread(
+            target=self._run, name="metrics-flush", daemon=True
+        )
+        self._thread.start()
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            self.flush()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        self.flush()
+
+    @staticmethod
+    def clear(directory: str) -> None:
+        for path in Path(directory).glob("*.json"):
+            path.unlink(missing_ok=True)
@@ -0,0 +1,77 @@
+import base64
+import json
+from datetime import datetime
+from typing import Any, Literal
+
+from sqlalchemy import ClauseElement, Select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.orm import Session
+from sqlalchemy.sql.expression import Executable
+
+# How list endpoints compute "total": an exact COUNT, the planner's row
+# estimate (PostgreSQL only, exact elsewhere) or not at all
+CountMode = Literal["exact", "estimated", "none"]
+
+
+def encode_cursor(last_id: int, key: Any = None) -> str:
+    """Cursor after ``last_id``, and its sort ``key`` when not paging by id."""
+    payload: dict[str, Any] = {"id": last_id}
+    if key is not None:
+        payload["key"] = key.isoformat() if isinstance(key, datetime) else key
+    raw = json.dumps(payload, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> tuple[int, Any]:
+    """Return the last seen id and sort key, raising ValueError if malformed."""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        payload = json.loads(raw)
+        last_id = payload["id"]
+    except (ValueError, TypeError, KeyError) as e:
+        raise ValueError("Invalid cursor") from e
+    if not isinstance(last_id, int):
+        raise ValueError("Invalid cursor")
+    return last_id, payload.get("key")
+
+
+class Explain(Executable, ClauseElement):
+    """EXPLAIN of a statement, with its parameters bound like the statement's."""
+
+    inherit_cache = False
+
+    def __init__(self, statement: Select, prefix: str) -> None:
+        self.statement = statement
+        self.prefix = prefix
+
+
+@compiles(Explain)
+def _compile_explain(element: Explain, compiler: Any, **kw: Any) -> str:
+    return f"{element.prefix} {compiler.process(element.statement, **kw)}"
+
+
+def _explain(db: Session | AsyncSession, statement: Select) -> Explain | None:
+    if db.get_bind().dialect.name != "postgresql":
+        return None
+    # Filter values come from the request, so they stay bound parameters
+    return Explain(statement, "EXPLAIN (FORMAT JSON)")
+
+
+def _plan_rows(plan: list[dict]) -> int:
+    return int(plan[0]["Plan"]["Plan Rows"])
+
+
+def estimate_count(db: Session, statement: Select) -> int | None:
+    """Planner row estimate for ``statement``, or None if unsupported."""
+    explain = _explain(db, statement)
+    if explain is None:
+        return None
+    return _plan_rows(db.execute(explain).scalar_one())
+
+
+async def estimate_count_async(db: AsyncSession, statement: Select) -> int | None:
+    explain = _explain(db, statement)
+    if explain is None:
+        return None
+    return _plan_rows((await db.execute(explain)).scalar_one())
@@ -0,0 +1,129 @@
+import logging
+import threading
+import time
+from typing import Any
+
+from sqlalchemy import event, exc
+from sqlalchemy.pool import AsyncAdaptedQueuePool, Pool, QueuePool
+
+from app.core.metrics import Histogram
+
+logger = logging.getLogger(__name__)
+
+
+class PoolStats:
+    """Checkout, overflow and timeout telemetry for one connection pool."""
+
+    def __init__(self, name: str, slow_checkout_seconds: float) -> None:
+        self.name = name
+        self.slow_checkout_seconds = slow_checkout_seconds
+        self.wait_time = Histogram()
+        self.connects = 0
+        self.overflow_events = 0
+        self.timeouts = 0
+        self.invalidations = 0
+        self._pool: Pool | None = None
+        self._lock = threading.Lock()
+
+    def _incr(self, counter: str) -> None:
+        with self._lock:
+            setattr(self, counter, getattr(self, counter) + 1)
+
+    def attach(self, pool: Pool) -> None:
+        self.bind(pool)
+        event.listen(pool, "connect", self._on_connect)
+        event.listen(pool, "invalidate", self._on_invalidate)
+
+    def bind(self, pool: Pool) -> None:
+        self._pool = pool
+        if isinstance(pool, _InstrumentedPoolMixin):
+            pool.stats = self
+
+    def _on_connect(self, dbapi_connection: Any, connection_record: Any) -> None:
+        self._incr("connects")
+        pool = self._pool
+        # QueuePool counts overflow from -pool_size, so > 0 means past the pool
+        if isinstance(pool, QueuePool) and pool.overflow() > 0:
+            self._incr("overflow_events")
+            logger.warning(
+                "Pool %s opened overflow connection %d/%d",
+                self.name,
+                pool.overflow(),
+                pool._max_overflow,
+            )
+
+    def _on_invalidate(
+        self, dbapi_connection: Any, connection_record: Any, exception: Any
+    ) -> None:
+        self._incr("invalidations")
+
+    def observe_checkout(self, seconds: float) -> None:
+        self.wait_time.observe(seconds)
+        if seconds >= self.slow_checkout_seconds:
+            logger.warning(
+                "Pool %s checkout waited %.3fs (%s)", self.name, seconds, self._status()
+            )
+
+    def _status(self) -> str:
+        return self._pool.status() if self._pool is not None else "detached"
+
+    def snapshot(self) -> dict[str, Any]:
+        pool = self._pool
+        checked_out = idle = overflow = size = None
+        if isinstance(pool, QueuePool):
+            checked_out = pool.checkedout()
+            idle = pool.checkedin()
+            overflow = max(pool.overflow(), 0)
+            size = pool.size()
+        return {
+            "pool": type(pool).__name__ if pool is not None else None,
+            "size": size,
+            "checked_out": checked_out,
+            "idle": idle,
+            "overflow": overflow,
+            "connects": self.connects,
+            "overflow_events": self.overflow_events,
+            "timeouts": self.timeouts,
+            "invalidations": self.invalidations,
+            "checkout_wait_seconds": self.wait_time.snapshot(),
+        }
+
+
+class _InstrumentedPoolMixin:
+    stats: PoolStats | None = None
+
+    def connect(self):
+        if self.stats is None:
+            return super().connect()
+        start = time.perf_counter()
+        try:
+            return super().connect()
+        except exc.TimeoutError:
+            self.stats._incr("timeouts")
+            raise
+        finally:
+            self.stats.observe_checkout(time.perf_counter() - start)
+
+    def recreate(self):
+        # Engine.dispose() swaps in a fresh pool that inherits our event
+        # listeners; point the same stats at it
+        pool = super().recreate()
+        if self.stats is not None:
+            self.stats.bind(pool)
+        return pool
+
+
+class InstrumentedQueuePool(_InstrumentedPoolMixin, QueuePool):
+    pass
+
+
+class InstrumentedAsyncAdaptedQueuePool(_InstrumentedPoolMixin, AsyncAdaptedQueuePool):
+    pass
+
+
+# SQLAlchemy names pool loggers after the pool class's module, which puts
+# these under app.* and the root INFO level; keep them as quiet as its own
+for _pool_class in (InstrumentedQueuePool, InstrumentedAsyncAdaptedQueuePool):
+    logging.getLogger(f"{_pool_class.__module__}.{_pool_class.__name__}").setLevel(
+        logging.WARNING
+    )
@@ -0,0 +1,64 @@
+"""Cache of authenticated users, keyed by id, for ``deps.get_current_user``.
+
+Entries hold plain column values so they can live in Redis as well as in
+process memory. The password hash is left out; it is loaded from the
+database on the rare paths that need it.
+"""
+
+from datetime import datetime
+from typing import Any
+
+from sqlalchemy.orm import make_transient_to_detached
+
+from app.core.cache import create_cache
+from app.core.config import settings
+from app.models.user import User, UserRole
+
+_EXCLUDED = {"hashed_password"}
+_COLUMNS = [c.key for c in User.__table__.columns if c.key not in _EXCLUDED]
+_DATETIME_COLUMNS = {"time_added", "last_update_time"}
+
+cache = create_cache(
+    settings.PRINCIPAL_CACHE_BACKEND,
+    ttl=settings.PRINCIPAL_CACHE_TTL_SECONDS,
+    max_size=settings.PRINCIPAL_CACHE_MAX_SIZE,
+    redis_url=settings.REDIS_URL,
+    prefix="principal:",
+)
+
+
+def _dump(user: User) -> dict[str, Any]:
+    data = {key: getattr(user, key) for key in _COLUMNS}
+    for key in _DATETIME_COLUMNS:
+        if data[key] is not None:
+            data[key] = data[key].isoformat()
+    if data["roles"] is not None:
+        data["roles"] = data["roles"].value
+    return data
+
+
+def _load(data: dict[str, Any]) -> User:
+    values = dict(data)
+    for key in _DATETIME_COLUMNS:
+        if values[key] is not None:
+            values[key] = datetime.fromisoformat(values[key])
+    if values["roles"] is not None:
+        values["roles"] = UserRole(values["roles"])
+    user = User(**values)
+    # Detached with an identity: adding it to a session attaches it as the
+    # persistent row, and the excluded columns load lazily on first access
+    make_transient_to_detached(user)
+    return user
+
+
+def get(user_id: int) -> User | None:
+    data = cache.get(str(user_id))
+    return _load(data) if data is not None else None
+
+
+def put(user: User) -> None:
+    cache.set(str(user.id), _dump(user))
+
+
+def invalidate(*user_ids: int) -> None:
+    cache.delete(*(str(user_id) for user_id in user_ids))
@@ -0,0 +1,303 @@
+"""Opt-in sampling profiler for individual requests.
+
+A sampled request gets a :class:`Profile` in a context variable. While it
+runs, a background thread periodically records the stacks of the threads
+serving it: the event loop thread, plus whichever worker thread is running
+its endpoint. SQL statements and their timings are recorded alongside. The
+last ``PROFILING_MAX_PROFILES`` results are kept per worker process.
+
+The event loop is shared, so async work of concurrent requests can show up
+in a profile's event loop samples; worker thread samples are the request's
+own.
+"""
+
+import hmac
+import itertools
+import random
+import sys
+import threading
+import time
+from collections import Counter, deque
+from collections.abc import Iterator
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from types import CodeType, FrameType
+from typing import Any
+
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core.config import settings
+from app.models.user import User, UserRole
+
+_ids = itertools.count(1)
+
+
+class Profile:
+    def __init__(self, method: str, path: str, requested: bool) -> None:
+        self.id = next(_ids)
+        self.method = method
+        self.path = path
+        self.route: str | None = None
+        self.status: int | None = None
+        # Asked for through the header rather than picked by the sample rate
+        self.requested = requested
+        self.user_role: UserRole | None = None
+        self.started_at = datetime.now(timezone.utc)
+        self.duration: float | None = None
+        self.threads: set[int] = set()
+        self.stacks: Counter[tuple[str, ...]] = Counter()
+        self.samples = 0
+        self.statements: list[tuple[str, float]] = []
+        self.dropped_statements = 0
+
+    @property
+    def by_admin(self) -> bool:
+        return self.user_role in (UserRole.ADMIN, UserRole.SUPERADMIN)
+
+    def sample(self, frames: dict[int, FrameType]) -> None:
+        for ident in tuple(self.threads):
+            frame = frames.get(ident)
+            if frame is not None:
+                self.stacks[_stack(frame)] += 1
+                self.samples += 1
+
+    def add_statement(self, statement: str, seconds: float) -> None:
+        if len(self.statements) < settings.PROFILING_MAX_STATEMENTS:
+            self.statements.append((statement, seconds))
+        else:
+            self.dropped_statements += 1
+
+    def summary(self) -> dict[str, Any]:
+        return {
+            "id": self.id,
+            "method": self.method,
+            "path": self.path,
+            "route": self.route,
+            "status": self.status,
+            "requested": self.requested,
+            "started_at": self.started_at,
+            "duration_seconds": self.duration,
+            "samples": self.samples,
+            "statements": len(self.statements) + self.dropped_statements,
+            "sql_seconds": sum(seconds for _, seconds in self.statements),
+        }
+
+    def detail(self) -> dict[str, Any]:
+        return {
+            **self.summary(),
+            "sql": [
+                {"statement": statement, "seconds": seconds}
+                for statement, seconds in self.statements
+            ],
+            "dropped_statements": self.dropped_statements,
+        }
+
+    def collapsed(self) -> str:
+        """Stacks in the collapsed format read by flamegraph.pl and speedscope."""
+        return "".join(
+            f"{';'.join(stack)} {count}\n" for stack, count in self.stacks.items()
+        )
+
+    def speedscope(self) -> dict[str, Any]:
+        frames: dict[str, int] = {}
+        samples = []
+        weights = []
+        for stack, count in self.stacks.items():
+            samples.append([frames.setdefault(name, len(frames)) for name in stack])
+            weights.append(count * settings.PROFILING_INTERVAL_SECONDS)
+        name = f"{self.method} {self.path} #{self.id}"
+        return {
+            "$schema": "https://www.speedscope.app/file-format-schema.json",
+            "shared": {"frames": [{"name": frame} for frame in frames]},
+            "profiles": [
+                {
+                    "type": "sampled",
+                    "name": name,
+                    "unit": "seconds",
+                    "startValue": 0,
+                    "endValue": sum(weights),
+                    "samples": samples,
+                    "weights": weights,
+                }
+            ],
+            "name": name,
+            "exporter": settings.PROJECT_NAME,
+        }
+
+
+_labels: dict[CodeType, str] = {}
+
+
+def _label(code: CodeType) -> str:
+    label = _labels.get(code)
+    if label is None:
+        label = f"{code.co_name} ({code.co_filename}:{code.co_firstlineno})"
+        _labels[code] = label
+    return label
+
+
+def _stack(frame: FrameType | None) -> tuple[str, ...]:
+    names = []
+    while frame is not None:
+        names.append(_label(frame.f_code))
+        frame = frame.f_back
+    names.reverse()
+    return tuple(names)
+
+
+class Sampler:
+    """One background thread sampling every active profile."""
+
+    def __init__(self, interval: float) -> None:
+        self.interval = interval
+        self._active: set[Profile] = set()
+        self._lock = threading.Lock()
+        self._thread: threading.Thread | None = None
+
+    def add(self, profile: Profile) -> None:
+        with self._lock:
+            self._active.add(profile)
+            if self._thread is None:
+                self._thread = threading.Thread(
+                    target=self._run, name="profiler", daemon=True
+                )
+                self._thread.start()
+
+    def remove(self, profile: Profile) -> None:
+        with self._lock:
+            self._active.discard(profile)
+
+    def _run(self) -> None:
+        while True:
+            with self._lock:
+                if not self._active:
+                    self._thread = None
+                    return
+                profiles = tuple(self._active)
+            frames = sys._current_frames()
+            for profile in profiles:
+                profile.sample(frames)
+            del frames
+            time.sleep(self.interval)
+
+
+class ProfileStore:
+    """Ring buffer of the most recent profiles."""
+
+    def __init__(self, max_size: int) -> None:
+        self._profiles: deque[Profile] = deque(maxlen=max_size)
+        self._lock = threading.Lock()
+
+    def add(self, profile: Profile) -> None:
+        with self._lock:
+            self._profiles.append(profile)
+
+    def list(self) -> list[Profile]:
+        with self._lock:
+            return list(reversed(self._profiles))
+
+    def get(self, profile_id: int) -> Profile | None:
+        with self._lock:
+            return next((p for p in self._profiles if p.id == profile_id), None)
+
+
+sampler = Sampler(settings.PROFILING_INTERVAL_SECONDS)
+profiles = ProfileStore(settings.PROFILING_MAX_PROFILES)
+
+_current: ContextVar[Profile | None] = ContextVar("profile", default=None)
+
+
+@contextmanager
+def thread_scope() -> Iterator[None]:
+    """Sample the calling thread for the current profile, if there is one."""
+    profile = _current.get()
+    if profile is None:
+        yield
+        return
+    ident = threading.get_ident()
+    profile.threads.add(ident)
+    try:
+        yield
+    finally:
+        profile.threads.discard(ident)
+
+
+def note_user(user: User) -> None:
+    """Record who made the request; header-triggered profiles need an admin."""
+    profile = _current.get()
+    if profile is not None:
+        profile.user_role = user.roles
+
+
+def add_statement(statement: str, seconds: float) -> None:
+    """Record a statement, timed by the request metrics hooks, if profiling."""
+    profile = _current.get()
+    if profile is not None:
+        profile.add_statement(statement, seconds)
+
+
+class ProfilingMiddleware:
+    """Profile a sample of requests, and admin requests that ask for it.
+
+    Requests sending ``PROFILING_HEADER`` set to ``PROFILING_TOKEN`` are
+    profiled as well; the result is kept, and its id returned in
+    ``X-Profile-Id``, only if the request authenticated as an admin. The
+    token is checked before sampling starts, since the user is not yet known.
+    """
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+        self.header = settings.PROFILING_HEADER.lower().encode("latin-1")
+        self.token = (
+            settings.PROFILING_TOKEN.encode()
+            if settings.PROFILING_TOKEN is not None
+            else None
+        )
+
+    def _requested(self, scope: Scope) -> bool:
+        if self.token is None:
+            return False
+        return any(
+            name == self.header and hmac.compare_digest(value, self.token)
+            for name, value in scope["headers"]
+        )
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        requested = self._requested(scope)
+        sampled = random.random() < settings.PROFILING_SAMPLE_RATE
+        if not requested and not sampled:
+            await self.app(scope, receive, send)
+            return
+
+        profile = Profile(scope["method"], scope["path"], requested=requested)
+        keep = sampled
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal keep
+            if message["type"] == "http.response.start":
+                profile.status = message["status"]
+                # Dependencies have run by now, so the user is known
+                if requested and profile.by_admin:
+                    keep = True
+                    headers = list(message.get("headers", []))
+                    headers.append((b"x-profile-id", str(profile.id).encode()))
+                    message = {**message, "headers": headers}
+            await send(message)
+
+        token = _current.set(profile)
+        profile.threads.add(threading.get_ident())
+        sampler.add(profile)
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            profile.duration = time.perf_counter() - start
+            sampler.remove(profile)
+            _current.reset(token)
+            profile.route = getattr(scope.get("route"), "path", None)
+            if keep:
+                profiles.add(profile)
@@ -0,0 +1,151 @@
+"""Per-request SQL statement counts, query budgets and slow-query logging.
+
+Statements are timed by the cursor hooks in :mod:`app.core.request_metrics`,
+which collect each request's normalised SQL and durations and pass them
+here. Statements longer than ``SLOW_QUERY_SECONDS`` are logged, and for
+each request:
+
+- a request running more statements than its route's budget is logged,
+  or fails with :class:`QueryBudgetExceeded` when ``QUERY_BUDGET_MODE`` is
+  ``"raise"`` (for test runs)
+- the same statement repeated ``QUERY_REPEAT_THRESHOLD`` times in one
+  request is logged as a likely N+1
+- each route's statements are aggregated, by normalised SQL, for
+  ``GET /admin/queries``
+"""
+
+import functools
+import logging
+import re
+import threading
+from collections import Counter
+from collections.abc import Callable
+from typing import Any, TypeVar
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+class QueryBudgetExceeded(Exception):
+    """Raised when a request runs more statements than its route allows."""
+
+
+_STRING = re.compile(r"'(?:[^']|'')*'")
+_NUMBER = re.compile(r"\b\d+(?:\.\d+)?\b")
+# ?, $1, %s and %(name)s placeholders, plus SQLAlchemy's expanding IN
+_PARAMETER = re.compile(r"\?|\$\d+|%\(\w+\)s|%s|\(__\[POSTCOMPILE_\w+\]\)")
+_PARAMETER_LIST = re.compile(r"\(\s*\?(?:\s*,\s*\?)+\s*\)")
+_ROWS = re.compile(r"\(\?\)(?:\s*,\s*\(\?\))+")
+_WHITESPACE = re.compile(r"\s+")
+
+
+@functools.lru_cache(maxsize=1024)
+def normalize(statement: str) -> str:
+    """Reduce a statement to its shape, so N+1 repeats compare equal."""
+    statement = _STRING.sub("?", statement)
+    statement = _PARAMETER.sub("?", statement)
+    statement = _NUMBER.sub("?", statement)
+    statement = _PARAMETER_LIST.sub("(?)", statement)
+    statement = _ROWS.sub("(?)", statement)
+    return _WHITESPACE.sub(" ", statement).strip()
+
+
+def query_budget(limit: int | None) -> Callable[[Callable[..., T]], Callable[..., T]]:
+    """Allow an endpoint ``limit`` statements per request, None for no limit."""
+
+    def decorator(endpoint: Callable[..., T]) -> Callable[..., T]:
+        endpoint._query_budget = limit
+        return endpoint
+
+    return decorator
+
+
+def log_if_slow(statement: str, seconds: float) -> None:
+    if seconds >= settings.SLOW_QUERY_SECONDS:
+        logger.warning(f"Slow query ({seconds:.3f}s): {normalize(statement)}")
+
+
+def check_budget(
+    endpoint: Callable[..., Any], statements: list[tuple[str, float]]
+) -> None:
+    """Compare the statements run so far with the endpoint's budget."""
+    if not settings.QUERY_STATS_ENABLED or settings.QUERY_BUDGET_MODE == "off":
+        return
+    budget = getattr(endpoint, "_query_budget", settings.QUERY_BUDGET_DEFAULT)
+    if budget is None or len(statements) <= budget:
+        return
+    message = (
+        f"{endpoint.__name__} ran {len(statements)} SQL statements, "
+        f"budget is {budget}: " + "; ".join(sql for sql, _ in statements)
+    )
+    if settings.QUERY_BUDGET_MODE == "raise":
+        raise QueryBudgetExceeded(message)
+    logger.warning(message)
+
+
+class RouteQueryReport:
+    """Statements per route, aggregated by normalised SQL."""
+
+    def __init__(self) -> None:
+        self._routes: dict[str, dict[str, Any]] = {}
+        self._lock = threading.Lock()
+
+    def add(self, route: str, statements: list[tuple[str, float]]) -> None:
+        """Record one request's statements, already normalised."""
+        with self._lock:
+            entry = self._routes.setdefault(
+                route, {"requests": 0, "max_statements": 0, "statements": {}}
+            )
+            entry["requests"] += 1
+            entry["max_statements"] = max(entry["max_statements"], len(statements))
+            for sql, seconds in statements:
+                stats = entry["statements"].setdefault(
+                    sql, {"count": 0, "total_seconds": 0.0, "max_seconds": 0.0}
+                )
+                stats["count"] += 1
+                stats["total_seconds"] += seconds
+                stats["max_seconds"] = max(stats["max_seconds"], seconds)
+
+    def snapshot(self) -> dict[str, Any]:
+        with self._lock:
+            routes = {
+                route: {
+                    "requests": entry["requests"],
+                    "max_statements": entry["max_statements"],
+                    "statements": [
+                        {
+                            "sql": sql,
+                            **stats,
+                            "per_request": stats["count"] / entry["requests"],
+                        }
+                        for sql, stats in sorted(
+                            entry["statements"].items(),
+                            key=lambda item: item[1]["total_seconds"],
+                            reverse=True,
+                        )
+                    ],
+                }
+                for route, entry in self._routes.items()
+            }
+        return routes
+
+    def clear(self) -> None:
+        with self._lock:
+            self._routes.clear()
+
+
+report = RouteQueryReport()
+
+
+def finish(route: str, statements: list[tuple[str, float]]) -> None:
+    """Report a finished request's statements and warn about repeats."""
+    if not settings.QUERY_STATS_ENABLED:
+        return
+    report.add(route, statements)
+    repeats = Counter(sql for sql, _ in statements)
+    for sql, count in repeats.items():
+        if count >= settings.QUERY_REPEAT_THRESHOLD:
+            logger.warning(f"{route} ran the same statement {count} times: {sql}")
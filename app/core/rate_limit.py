@@ -0,0 +1,129 @@
+"""Sliding-window rate limits for the unauthenticated auth endpoints.
+
+Each rule allows ``limit`` attempts per key in any ``window`` seconds. Rejected
+attempts are not counted, so a client that backs off for ``Retry-After``
+seconds gets through again. "memory" limits are per worker process; "redis"
+limits are shared by every worker through REDIS_URL.
+"""
+
+import threading
+import time
+import uuid
+from collections import OrderedDict, deque
+from typing import Protocol
+
+from app.core.config import settings
+
+
+class RateLimitExceeded(Exception):
+    def __init__(self, retry_after: float) -> None:
+        super().__init__(f"Rate limit exceeded, retry in {retry_after:.1f}s")
+        self.retry_after = retry_after
+
+
+class RateLimitBackend(Protocol):
+    async def hit(self, key: str, limit: int, window: float) -> float | None:
+        """Record an attempt, or return seconds until one is allowed."""
+        ...
+
+
+class MemoryRateLimiter:
+    """Per-process sliding-window log, forgetting the least recent keys."""
+
+    def __init__(self, max_keys: int) -> None:
+        self.max_keys = max_keys
+        self._attempts: OrderedDict[str, deque[float]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    async def hit(self, key: str, limit: int, window: float) -> float | None:
+        now = time.monotonic()
+        with self._lock:
+            attempts = self._attempts.get(key)
+            if attempts is None:
+                attempts = self._attempts[key] = deque()
+            self._attempts.move_to_end(key)
+            while attempts and attempts[0] <= now - window:
+                attempts.popleft()
+            if len(attempts) >= limit:
+                return attempts[0] + window - now
+            attempts.append(now)
+            while len(self._attempts) > self.max_keys:
+                self._attempts.popitem(last=False)
+        return None
+
+
+# Prune, check and record in one round trip, atomically across workers
+_REDIS_HIT = """
+local now = tonumber(ARGV[1])
+local window = tonumber(ARGV[2])
+local limit = tonumber(ARGV[3])
+redis.call('ZREMRANGEBYSCORE', KEYS[1], '-inf', now - window)
+if redis.call('ZCARD', KEYS[1]) < limit then
+    redis.call('ZADD', KEYS[1], now, ARGV[4])
+    redis.call('PEXPIRE', KEYS[1], math.ceil(window * 1000))
+    return nil
+end
+local oldest = redis.call('ZRANGE', KEYS[1], 0, 0, 'WITHSCORES')
+return tostring(tonumber(oldest[2]) + window - now)
+"""
+
+
+class RedisRateLimiter:
+    """Sliding-window log in a Redis sorted set, shared by every worker."""
+
+    def __init__(self, url: str, prefix: str) -> None:
+        try:
+            import redis.asyncio as redis
+        except ImportError as e:
+            raise RuntimeError(
+                "The redis rate limit backend needs the 'redis' extra installed"
+            ) from e
+        self.prefix = prefix
+        self._client = redis.Redis.from_url(url)
+        self._script = self._client.register_script(_REDIS_HIT)
+
+    async def hit(self, key: str, limit: int, window: float) -> float | None:
+        retry_after = await self._script(
+            keys=[self.prefix + key],
+            args=[time.time(), window, limit, uuid.uuid4().hex],
+        )
+        return float(retry_after) if retry_after is not None else None
+
+
+class NullRateLimiter:
+    async def hit(self, key: str, limit: int, window: float) -> float | None:
+        return None
+
+
+def create_rate_limiter(
+    backend: str, *, max_keys: int, redis_url: str | None, prefix: str
+) -> RateLimitBackend:
+    if backend == "memory":
+        return MemoryRateLimiter(max_keys=max_keys)
+    if backend == "redis":
+        if not redis_url:
+            raise RuntimeError("REDIS_URL must be set to use the redis rate limiter")
+        return RedisRateLimiter(redis_url, prefix=prefix)
+    return NullRateLimiter()
+
+
+limiter = create_rate_limiter(
+    settings.RATE_LIMIT_BACKEND,
+    max_keys=settings.RATE_LIMIT_MAX_KEYS,
+    redis_url=settings.REDIS_URL,
+    prefix="ratelimit:",
+)
+
+
+async def check(rules: list[tuple[str, int, float]]) -> None:
+    """Count an attempt against each ``(key, limit, window)`` rule.
+
+    Raises RateLimitExceeded with the longest wait if any rule is exhausted.
+    """
+    retry_after = 0.0
+    for key, limit, window in rules:
+        wait = await limiter.hit(key, limit, window)
+        if wait is not None:
+            retry_after = max(retry_after, wait)
+    if retry_after > 0:
+        raise RateLimitExceeded(retry_after)
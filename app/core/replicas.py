@@ -0,0 +1,122 @@
+"""Read replica health checks and round-robin selection.
+
+A background thread checks every replica each ``interval`` seconds. A
+replica that cannot be reached, or is more than ``max_lag`` seconds behind
+the primary, is skipped until a later check passes; with none usable, reads
+go to the primary.
+"""
+
+import itertools
+import logging
+import threading
+import time
+from typing import Any
+
+from sqlalchemy import text
+from sqlalchemy.engine import Engine
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+logger = logging.getLogger(__name__)
+
+# A standby that has replayed all the WAL it received is caught up, however
+# old its last transaction. A server that is not a standby (such as a second
+# local database) returns NULL, taken as no lag.
+_LAG_QUERIES = {
+    "postgresql": text(
+        "SELECT COALESCE(CASE WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn()"
+        " THEN 0 ELSE EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp())"
+        " END, 0)"
+    ),
+}
+# Other databases have no replication lag to measure, only reachability
+_PING = text("SELECT 0")
+
+
+class Replica:
+    def __init__(self, engine: Engine, async_engine: AsyncEngine) -> None:
+        self.name = engine.url.render_as_string(hide_password=True)
+        self.engine = engine
+        self.async_engine = async_engine
+        # Unused until the first check passes
+        self.healthy = False
+        self.lag_seconds: float | None = None
+        self.error: str | None = None
+        self.checked_at: float | None = None
+
+    def check(self, max_lag: float) -> None:
+        query = _LAG_QUERIES.get(self.engine.dialect.name, _PING)
+        was_healthy = self.healthy
+        try:
+            with self.engine.connect() as conn:
+                self.lag_seconds = float(conn.execute(query).scalar() or 0)
+        except Exception as e:
+            self.lag_seconds = None
+            self.error = str(e)
+        else:
+            self.error = (
+                f"{self.lag_seconds:.1f}s behind the primary"
+                if self.lag_seconds > max_lag
+                else None
+            )
+        self.healthy = self.error is None
+        self.checked_at = time.monotonic()
+        if was_healthy and not self.healthy:
+            logger.warning(f"Replica {self.name} taken out of rotation: {self.error}")
+        elif self.healthy and not was_healthy:
+            logger.info(f"Replica {self.name} in rotation")
+
+    def snapshot(self) -> dict[str, Any]:
+        return {
+            "healthy": self.healthy,
+            "lag_seconds": self.lag_seconds,
+            "error": self.error,
+            "checked_seconds_ago": (
+                time.monotonic() - self.checked_at
+                if self.checked_at is not None
+                else None
+            ),
+        }
+
+
+class ReplicaSet:
+    def __init__(self, replicas: list[Replica], max_lag: float, interval: float):
+        self.replicas = replicas
+        self.max_lag = max_lag
+        self.interval = interval
+        self._turn = itertools.count()
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    def pick(self) -> Replica | None:
+        """The next healthy replica in turn, or None to use the primary."""
+        healthy = [replica for replica in self.replicas if replica.healthy]
+        if not healthy:
+            return None
+        return healthy[next(self._turn) % len(healthy)]
+
+    def check(self) -> None:
+        for replica in self.replicas:
+            replica.check(self.max_lag)
+
+    def start(self) -> None:
+        if not self.replicas:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(
+            target=self._run, name="replica-health", daemon=True
+        )
+        self._thread.start()
+
+    def _run(self) -> None:
+        self.check()
+        while not self._stop.wait(self.interval):
+            self.check()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def snapshot(self) -> dict[str, Any]:
+        return {replica.name: replica.snapshot() for replica in self.replicas}
@@ -0,0 +1,245 @@
+"""Per-request latency, throughput and SQL/password-hash/serialisation time.
+
+The middleware keeps a :class:`RequestTimings` in a context variable for
+the duration of each request. Threadpool calls copy the context, so the SQL
+event hooks and password hashing can add their time to it from any thread.
+
+These are the only SQL cursor hooks: each statement is timed once here, and
+query budgets, the per-route query report, slow-query logging and profiles
+are all fed from that timing.
+"""
+
+import functools
+import inspect
+import time
+from collections.abc import Callable, Iterator
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any
+
+from fastapi.routing import APIRoute
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core import profiling, query_stats
+from app.core.config import settings
+from app.core.metrics import MultiprocessStore, registry
+
+# Label for requests no route matched, so junk paths cannot add series
+UNMATCHED_ROUTE = "unmatched"
+
+# Statements per request
+QUERY_COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+
+requests_total = registry.counter(
+    "http_requests_total", "Requests handled", ["method", "route", "status"]
+)
+request_duration = registry.histogram(
+    "http_request_duration_seconds", "Request latency", ["method", "route"]
+)
+requests_in_flight = registry.gauge(
+    "http_requests_in_flight", "Requests being handled", ["method"]
+)
+component_duration = registry.histogram(
+    "http_request_component_seconds",
+    "Time per request spent in sql, password_hash and serialization",
+    ["route", "component"],
+)
+request_queries = registry.histogram(
+    "http_request_sql_queries",
+    "SQL statements executed per request",
+    ["route"],
+    buckets=QUERY_COUNT_BUCKETS,
+)
+
+store = (
+    MultiprocessStore(
+        settings.METRICS_MULTIPROC_DIR, registry, settings.METRICS_FLUSH_SECONDS
+    )
+    if settings.METRICS_MULTIPROC_DIR
+    else None
+)
+
+
+def collect() -> list[dict[str, Any]]:
+    """This process's metrics, or every worker's when they share a directory."""
+    return store.collect() if store is not None else registry.snapshot()
+
+
+class RequestTimings:
+    def __init__(self) -> None:
+        # Normalised SQL and seconds, one entry per statement
+        self.statements: list[tuple[str, float]] = []
+        self.components: dict[str, float] = {}
+        self.endpoint_done: float | None = None
+
+    @property
+    def queries(self) -> int:
+        return len(self.statements)
+
+    def add(self, component: str, seconds: float) -> None:
+        self.components[component] = self.components.get(component, 0.0) + seconds
+
+
+_current: ContextVar[RequestTimings | None] = ContextVar(
+    "request_timings", default=None
+)
+
+
+def current() -> RequestTimings | None:
+    return _current.get()
+
+
+@contextmanager
+def track(component: str) -> Iterator[None]:
+    """Add the time spent in the block to the current request's ``component``."""
+    timings = _current.get()
+    if timings is None:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        timings.add(component, time.perf_counter() - start)
+
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    # Outside requests too, so slow statements at startup are still logged
+    conn.info.setdefault("request_query_start", []).append(time.perf_counter())
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    starts = conn.info.get("request_query_start")
+    if not starts:
+        return
+    seconds = time.perf_counter() - starts.pop()
+    query_stats.log_if_slow(statement, seconds)
+    timings = _current.get()
+    if timings is None:
+        return
+    timings.statements.append((query_stats.normalize(statement), seconds))
+    timings.add("sql", seconds)
+    profiling.add_statement(statement, seconds)
+
+
+@event.listens_for(Engine, "handle_error")
+def _handle_error(exception_context) -> None:
+    # after_cursor_execute is skipped for failed statements
+    conn = exception_context.connection
+    if conn is not None and conn.info.get("request_query_start"):
+        conn.info["request_query_start"].pop()
+
+
+def _mark_endpoint_done() -> None:
+    timings = _current.get()
+    if timings is not None:
+        timings.endpoint_done = time.perf_counter()
+
+
+def _check_budget(endpoint: Callable[..., Any]) -> None:
+    timings = _current.get()
+    if timings is not None:
+        query_stats.check_budget(endpoint, timings.statements)
+
+
+def _timed(endpoint: Callable[..., Any]) -> Callable[..., Any]:
+    # Whatever happens between the endpoint returning and the response
+    # starting is FastAPI validating and encoding the return value. The
+    # query budget is checked here, while an error can still fail the request.
+    if inspect.iscoroutinefunction(endpoint):
+
+        @functools.wraps(endpoint)
+        async def run_async(*args: Any, **kwargs: Any) -> Any:
+            try:
+                result = await endpoint(*args, **kwargs)
+                _check_budget(endpoint)
+                return result
+            finally:
+                _mark_endpoint_done()
+
+        wrapper = run_async
+    else:
+
+        @functools.wraps(endpoint)
+        def run(*args: Any, **kwargs: Any) -> Any:
+            try:
+                with profiling.thread_scope():
+                    result = endpoint(*args, **kwargs)
+                _check_budget(endpoint)
+                return result
+            finally:
+                _mark_endpoint_done()
+
+        wrapper = run
+    wrapper._timed = True
+    return wrapper
+
+
+class TimedRoute(APIRoute):
+    """Route class that lets the metrics middleware time serialisation."""
+
+    def __init__(self, path: str, endpoint: Callable[..., Any], **kwargs: Any):
+        # include_router rebuilds routes from the already wrapped endpoint
+        if not getattr(endpoint, "_timed", False):
+            endpoint = _timed(endpoint)
+        super().__init__(path, endpoint, **kwargs)
+
+
+def route_label(scope: Scope) -> str:
+    route = scope.get("route")
+    return getattr(route, "path", None) or UNMATCHED_ROUTE
+
+
+class MetricsMiddleware:
+    """Pure ASGI middleware, so streamed responses are timed to the last byte.
+
+    It always runs, since query stats and profiling read its timings; the
+    Prometheus series are only recorded when ``METRICS_ENABLED``.
+    """
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        method = scope["method"]
+        timings = RequestTimings()
+        token = _current.set(timings)
+        status = 500
+        start = time.perf_counter()
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                if timings.endpoint_done is not None:
+                    timings.add(
+                        "serialization", time.perf_counter() - timings.endpoint_done
+                    )
+            await send(message)
+
+        if settings.METRICS_ENABLED:
+            requests_in_flight.inc(method)
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            elapsed = time.perf_counter() - start
+            _current.reset(token)
+            route_path = getattr(scope.get("route"), "path", None)
+            if route_path is not None:
+                query_stats.finish(route_path, timings.statements)
+            if settings.METRICS_ENABLED:
+                requests_in_flight.dec(method)
+                route = route_label(scope)
+                requests_total.inc(method, route, str(status))
+                request_duration.observe(elapsed, method, route)
+                request_queries.observe(timings.queries, route)
+                for component, seconds in timings.components.items():
+                    component_duration.observe(seconds, route, component)
@@ -1,14 +1,40 @@
+import hashlib
+import time
+from collections.abc import Sequence
 from datetime import datetime, timedelta, timezone
-from typing import Any
+from typing import Any, NamedTuple
 
 import jwt
 from passlib.context import CryptContext
 
+from .cache import MemoryCache
 from .config import settings
+from .hashing import PasswordHashPool
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# Pinning min and max to the configured cost makes needs_update() flag any
+# hash made with a different cost, as well as any non-default scheme
+pwd_context = CryptContext(
+    schemes=["bcrypt", "argon2"],
+    default=settings.PASSWORD_HASH_SCHEME,
+    deprecated="auto",
+    bcrypt__rounds=settings.BCRYPT_ROUNDS,
+    bcrypt__min_rounds=settings.BCRYPT_ROUNDS,
+    bcrypt__max_rounds=settings.BCRYPT_ROUNDS,
+    argon2__type="ID",
+    argon2__rounds=settings.ARGON2_TIME_COST,
+    argon2__min_rounds=settings.ARGON2_TIME_COST,
+    argon2__max_rounds=settings.ARGON2_TIME_COST,
+    argon2__memory_cost=settings.ARGON2_MEMORY_COST,
+    argon2__parallelism=settings.ARGON2_PARALLELISM,
+)
 ALGORITHM = "HS256"
 
+password_hash_pool = PasswordHashPool(
+    settings.PASSWORD_HASH_EXECUTOR,
+    workers=settings.PASSWORD_HASH_WORKERS,
+    max_queue=settings.PASSWORD_HASH_MAX_QUEUE,
+)
+
 
 def create_access_token(
     subject: str | Any, expires_delta: timedelta | None = None
@@ -38,9 +64,98 @@ def create_refresh_token(
     return encoded_jwt
 
 
-def verify_password(plain_password: str, hashed_password: str) -> bool:
+# Module-level so the process executor can pickle them by reference
+def _verify(plain_password: str, hashed_password: str) -> bool:
     return pwd_context.verify(plain_password, hashed_password)
 
 
-def get_password_hash(password: str) -> str:
+def _verify_and_update(
+    plain_password: str, hashed_password: str
+) -> tuple[bool, str | None]:
+    return pwd_context.verify_and_update(plain_password, hashed_password)
+
+
+def _hash(password: str) -> str:
     return pwd_context.hash(password)
+
+
+class TokenClaims(NamedTuple):
+    sub: str | None
+    exp: int | None
+    refresh: bool
+
+
+_token_cache = MemoryCache(
+    ttl=settings.JWT_CACHE_TTL_SECONDS, max_size=settings.JWT_CACHE_MAX_SIZE
+)
+
+
+def _parse_claims(payload: dict[str, Any]) -> TokenClaims:
+    # Same rules as schemas.token.TokenPayload, without building a model
+    sub = payload.get("sub")
+    exp = payload.get("exp")
+    refresh = payload.get("refresh") or False
+    if (
+        (sub is not None and not isinstance(sub, str))
+        or (exp is not None and (not isinstance(exp, int) or isinstance(exp, bool)))
+        or not isinstance(refresh, bool)
+    ):
+        raise jwt.InvalidTokenError("Malformed token claims")
+    return TokenClaims(sub=sub, exp=exp, refresh=refresh)
+
+
+def decode_token(token: str) -> TokenClaims:
+    """Verify a token and return its claims, reusing earlier verifications.
+
+    Raises ``jwt.PyJWTError`` for invalid or expired tokens.
+    """
+    key = hashlib.sha256(token.encode()).hexdigest()
+    claims = _token_cache.get(key)
+    if claims is not None:
+        if claims.exp is None or claims.exp > time.time():
+            return claims
+        _token_cache.delete(key)
+    payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[ALGORITHM])
+    claims = _parse_claims(payload)
+    _token_cache.set(key, claims)
+    return claims
+
+
+def verify_password(plain_password: str, hashed_password: str) -> bool:
+    return password_hash_pool.run("verify", _verify, plain_password, hashed_password)
+
+
+def verify_and_update_password(
+    plain_password: str, hashed_password: str
+) -> tuple[bool, str | None]:
+    """Verify a password and return a replacement hash if it is outdated."""
+    return password_hash_pool.run(
+        "verify", _verify_and_update, plain_password, hashed_password
+    )
+
+
+def get_password_hash(password: str) -> str:
+    return password_hash_pool.run("hash", _hash, password)
+
+
+def get_password_hashes(passwords: Sequence[str]) -> list[str]:
+    """Hash a batch of passwords in parallel across the hashing pool."""
+    return password_hash_pool.map("hash", _hash, passwords)
+
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    return await password_hash_pool.run_async(
+        "verify", _verify, plain_password, hashed_password
+    )
+
+
+async def verify_and_update_password_async(
+    plain_password: str, hashed_password: str
+) -> tuple[bool, str | None]:
+    return await password_hash_pool.run_async(
+        "verify", _verify_and_update, plain_password, hashed_password
+    )
+
+
+async def get_password_hash_async(password: str) -> str:
+    return await password_hash_pool.run_async("hash", _hash, password)
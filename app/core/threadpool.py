@@ -0,0 +1,161 @@
+"""Named thread limiters for sync endpoints, with saturation telemetry.
+
+FastAPI runs every sync ``def`` endpoint and dependency on AnyIO's single
+default limiter. Routers built with :func:`limited_route` run their sync
+endpoints on a limiter of their own instead, so slow password checks on the
+auth routes cannot take the threads the user reads need.
+"""
+
+import functools
+import inspect
+import logging
+import threading
+import time
+from collections.abc import Callable
+from typing import Any, TypeVar
+
+from anyio import CapacityLimiter, to_thread
+
+from app.core import profiling
+from app.core.config import settings
+from app.core.metrics import Histogram
+from app.core.request_metrics import TimedRoute
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+class ThreadLimiter:
+    """Capacity limiter that records how long calls wait for a thread."""
+
+    def __init__(self, name: str, tokens: int, slow_wait_seconds: float) -> None:
+        self.name = name
+        self.tokens = tokens
+        self.slow_wait_seconds = slow_wait_seconds
+        self.wait_time = Histogram()
+        self.calls = 0
+        self.slow_waits = 0
+        self._limiter: CapacityLimiter | None = None
+        self._lock = threading.Lock()
+
+    def start(self) -> None:
+        # Limiters belong to an event loop, so each worker makes its own
+        self._limiter = CapacityLimiter(self.tokens)
+
+    def _get(self) -> CapacityLimiter:
+        if self._limiter is None:
+            self.start()
+        return self._limiter
+
+    async def run_sync(self, fn: Callable[..., T], *args: Any) -> T:
+        submitted = time.perf_counter()
+
+        def call() -> T:
+            self._observe_wait(time.perf_counter() - submitted)
+            with profiling.thread_scope():
+                return fn(*args)
+
+        return await to_thread.run_sync(call, limiter=self._get())
+
+    def _observe_wait(self, seconds: float) -> None:
+        # Runs on the worker thread
+        self.wait_time.observe(seconds)
+        slow = seconds >= self.slow_wait_seconds
+        with self._lock:
+            self.calls += 1
+            self.slow_waits += slow
+        if slow:
+            logger.warning(
+                "Threadpool %s wait was %.3fs (%s)", self.name, seconds, self._status()
+            )
+
+    def _status(self) -> str:
+        if self._limiter is None:
+            return "not started"
+        stats = self._limiter.statistics()
+        return (
+            f"{stats.borrowed_tokens}/{stats.total_tokens} in use, "
+            f"{stats.tasks_waiting} waiting"
+        )
+
+    def snapshot(self) -> dict[str, Any]:
+        return {
+            **_limiter_stats(self._limiter, self.tokens),
+            "calls": self.calls,
+            "slow_waits": self.slow_waits,
+            "wait_seconds": self.wait_time.snapshot(),
+        }
+
+
+def _limiter_stats(limiter: CapacityLimiter | None, tokens: int) -> dict[str, Any]:
+    if limiter is None:
+        return {"total_tokens": tokens, "in_use": 0, "waiting": 0}
+    stats = limiter.statistics()
+    return {
+        "total_tokens": stats.total_tokens,
+        "in_use": stats.borrowed_tokens,
+        "waiting": stats.tasks_waiting,
+    }
+
+
+limiters = {
+    "auth": ThreadLimiter(
+        "auth", settings.THREADPOOL_AUTH_SIZE, settings.THREADPOOL_SLOW_WAIT_SECONDS
+    ),
+    "users": ThreadLimiter(
+        "users", settings.THREADPOOL_USERS_SIZE, settings.THREADPOOL_SLOW_WAIT_SECONDS
+    ),
+}
+
+
+def configure() -> None:
+    """Size the default limiter and create the named ones in this event loop."""
+    to_thread.current_default_thread_limiter().total_tokens = (
+        settings.SERVER_THREADPOOL_SIZE
+    )
+    for limiter in limiters.values():
+        limiter.start()
+
+
+def snapshot() -> dict[str, Any]:
+    """Usage of every limiter; must be called from the event loop."""
+    # FastAPI acquires the default limiter itself, so its waits are not timed
+    default = to_thread.current_default_thread_limiter()
+    return {
+        "default": _limiter_stats(default, settings.SERVER_THREADPOOL_SIZE),
+        **{name: limiter.snapshot() for name, limiter in limiters.items()},
+    }
+
+
+def run_on(name: str) -> Callable[[Callable[..., T]], Callable[..., T]]:
+    """Run one endpoint on ``name`` instead of its router's limiter."""
+
+    def decorator(endpoint: Callable[..., T]) -> Callable[..., T]:
+        endpoint._threadpool = name
+        return endpoint
+
+    return decorator
+
+
+def _offload(endpoint: Callable[..., Any], limiter: ThreadLimiter) -> Callable:
+    # wraps() keeps the signature FastAPI reads parameters from, while the
+    # coroutine wrapper stops it sending the call to the default limiter
+    @functools.wraps(endpoint)
+    async def run(*args: Any, **kwargs: Any) -> Any:
+        return await limiter.run_sync(functools.partial(endpoint, *args, **kwargs))
+
+    return run
+
+
+def limited_route(name: str) -> type[TimedRoute]:
+    """Route class running sync endpoints on the ``name`` limiter."""
+
+    class LimitedRoute(TimedRoute):
+        def __init__(self, path: str, endpoint: Callable[..., Any], **kwargs: Any):
+            if not inspect.iscoroutinefunction(endpoint):
+                limiter = limiters[getattr(endpoint, "_threadpool", name)]
+                endpoint = _offload(endpoint, limiter)
+            super().__init__(path, endpoint, **kwargs)
+
+    return LimitedRoute
@@ -0,0 +1,91 @@
+"""Filters, sort orders and keyset paging for user list queries.
+
+Each sort order pages by its column, then by id where the column is not
+unique, so a cursor carries the last row's sort value as well as its id.
+The filters and orders here are the ones the users filter indexes serve.
+"""
+
+from datetime import datetime
+from typing import Any, Literal
+
+from sqlalchemy import ColumnElement, func, or_, tuple_
+
+from app.core import pagination
+from app.models.user import User
+from app.schemas.user import UserFilter
+
+UserSort = Literal["id", "-id", "time_added", "-time_added", "username", "-username"]
+
+# Sortable columns, and whether they are unique on their own
+_SORT_COLUMNS = {
+    "id": (User.id, True),
+    "time_added": (User.time_added, False),
+    "username": (User.username, True),
+}
+
+
+def filter_clauses(user_filter: UserFilter) -> list[ColumnElement[bool]]:
+    clauses = []
+    if user_filter.roles is not None:
+        clauses.append(User.roles == user_filter.roles)
+    if user_filter.is_active is not None:
+        clauses.append(User.is_active == user_filter.is_active)
+    if user_filter.added_after is not None:
+        clauses.append(User.time_added >= user_filter.added_after)
+    if user_filter.added_before is not None:
+        clauses.append(User.time_added < user_filter.added_before)
+    # lower() on both sides matches the functional and trigram indexes
+    if user_filter.username_prefix is not None:
+        clauses.append(
+            func.lower(User.username).startswith(
+                user_filter.username_prefix.lower(), autoescape=True
+            )
+        )
+    if user_filter.email_prefix is not None:
+        clauses.append(
+            func.lower(User.email).startswith(
+                user_filter.email_prefix.lower(), autoescape=True
+            )
+        )
+    if user_filter.search is not None:
+        term = user_filter.search.lower()
+        clauses.append(
+            or_(
+                func.lower(User.username).contains(term, autoescape=True),
+                func.lower(User.email).contains(term, autoescape=True),
+            )
+        )
+    return clauses
+
+
+def order_by(sort: UserSort) -> list[ColumnElement[Any]]:
+    column, unique = _SORT_COLUMNS[sort.lstrip("-")]
+    columns = [column] if unique else [column, User.id]
+    if sort.startswith("-"):
+        return [c.desc() for c in columns]
+    return columns
+
+
+def after_cursor(sort: UserSort, cursor: str) -> ColumnElement[bool]:
+    """Rows after the cursor's in ``sort`` order; raises ValueError if malformed."""
+    last_id, key = pagination.decode_cursor(cursor)
+    column, unique = _SORT_COLUMNS[sort.lstrip("-")]
+    descending = sort.startswith("-")
+    if column is User.id:
+        return User.id < last_id if descending else User.id > last_id
+    if not isinstance(key, str):
+        raise ValueError("Invalid cursor")
+    if column is User.time_added:
+        key = datetime.fromisoformat(key)
+    if unique:
+        return column < key if descending else column > key
+    position = tuple_(column, User.id)
+    return position < (key, last_id) if descending else position > (key, last_id)
+
+
+def next_cursor(sort: UserSort, row: Any) -> str:
+    """Cursor for the page after ``row``, the last row of this one."""
+    column, _ = _SORT_COLUMNS[sort.lstrip("-")]
+    if column is User.id:
+        return pagination.encode_cursor(row.id)
+    return pagination.encode_cursor(row.id, getattr(row, column.key))
@@ -27,7 +27,6 @@ def init_db(db: Session) -> None:
         )
         db.add(user)
         db.commit()
-        db.refresh(user)
         logger.info("Initial superuser created successfully.")
     else:
         logger.info("Initial superuser already exists.")
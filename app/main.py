@@ -1,61 +1,146 @@
+import asyncio
 import logging
+import math
 import time
 from contextlib import asynccontextmanager
 
-from alembic import command
-from alembic.config import Config
-from fastapi import FastAPI
-from sqlalchemy import create_engine
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, ORJSONResponse, PlainTextResponse
 
+from app import prestart
 from app.api.api_v1.api import api_router
+from app.core import profiling, request_metrics, threadpool
+from app.core.compression import CompressionMiddleware
 from app.core.config import settings
-from app.core.db import DATABASE_URL
-from app.initial_data import main as init_data_main
+from app.core.db import async_engine, replicas
+from app.core.hashing import PasswordHashPoolBusy
+from app.core.metrics import render_prometheus
+from app.core.rate_limit import RateLimitExceeded
+from app.core.security import password_hash_pool
+from app.utils.email import email_queue, precompile_email_templates
+from app.utils.email_queue import EmailQueueFull
 
 logger = logging.getLogger(__name__)
 logger.setLevel(logging.INFO)
 
 
+async def wait_for_db() -> None:
+    for delay in prestart.backoff_delays():
+        try:
+            await asyncio.to_thread(prestart.check_db)
+            return
+        except Exception as e:
+            logger.warning(f"Waiting {delay:.1f}s for database to be ready: {e}")
+            await asyncio.sleep(delay)
+    await asyncio.to_thread(prestart.check_db)
+
+
+async def verify_schema() -> None:
+    current, head = await asyncio.to_thread(prestart.schema_revisions)
+    if current != head:
+        raise RuntimeError(
+            f"Database schema is at revision {current}, expected {head}. "
+            "Run `python -m app.prestart` before starting the app."
+        )
+
+
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    # Wait for DB readiness
-    retries = 5
-    while retries > 0:
-        try:
-            engine = create_engine(DATABASE_URL)
-            with engine.connect():
-                pass
-            break
-        except Exception:
-            logger.warning(
-                f"Waiting for database to be ready... {retries} retries left"
-            )
-            time.sleep(1)
-            retries -= 1
-
-    if retries == 0:
-        logger.error("Database connection failed. Exiting.")
-        raise Exception("Database connection failed.")
-
-    # Run Alembic migrations
-    logger.info("Running database migrations...")
-    alembic_cfg = Config("alembic.ini")
-    command.upgrade(alembic_cfg, "head")
-    logger.info("Migrations completed.")
-
-    # Initialize data
-    logger.info("Initializing database data...")
-    init_data_main()
-    logger.info("Database initialization completed.")
+    start = time.perf_counter()
+    # Thread limiters for the sync endpoints, per worker process
+    threadpool.configure()
+    if request_metrics.store is not None:
+        request_metrics.store.start()
+    # Replicas join the rotation once their first health check passes
+    replicas.start()
+
+    # Migrations and seeding belong to the one-shot app.prestart; running
+    # them here would repeat them in every worker on every boot
+    if settings.DB_STARTUP_MODE != "skip":
+        await wait_for_db()
+    if settings.DB_STARTUP_MODE == "migrate":
+        await asyncio.to_thread(prestart.migrate_and_seed)
+    elif settings.DB_STARTUP_MODE == "verify":
+        await verify_schema()
+
+    precompile_email_templates()
+
+    app.state.boot_seconds = time.perf_counter() - start
+    logger.info(f"Startup completed in {app.state.boot_seconds:.3f}s")
 
     yield
 
+    await async_engine.dispose()
+    replicas.stop()
+    for replica in replicas.replicas:
+        await replica.async_engine.dispose()
+    password_hash_pool.shutdown()
+    # Draining can wait on the relay, so keep it off the event loop
+    await asyncio.to_thread(email_queue.stop, timeout=settings.SMTP_TIMEOUT)
+    if request_metrics.store is not None:
+        request_metrics.store.stop()
+
 
-app = FastAPI(title=settings.PROJECT_NAME, lifespan=lifespan)
+app = FastAPI(
+    title=settings.PROJECT_NAME,
+    lifespan=lifespan,
+    default_response_class=ORJSONResponse,
+)
+
+if settings.COMPRESSION_ENABLED:
+    app.add_middleware(
+        CompressionMiddleware,
+        minimum_size=settings.COMPRESSION_MINIMUM_SIZE,
+        gzip_level=settings.COMPRESSION_GZIP_LEVEL,
+        brotli_quality=(
+            settings.COMPRESSION_BROTLI_QUALITY if settings.COMPRESSION_BROTLI else None
+        ),
+    )
+if settings.PROFILING_ENABLED:
+    app.add_middleware(profiling.ProfilingMiddleware)
+# Outermost, and always on: query stats and profiling read its SQL timings
+app.add_middleware(request_metrics.MetricsMiddleware)
 
 app.include_router(api_router, prefix=settings.API_V1_STR)
 
 
+@app.exception_handler(PasswordHashPoolBusy)
+async def password_hash_pool_busy_handler(request: Request, exc: PasswordHashPoolBusy):
+    return JSONResponse(
+        status_code=503,
+        content={"detail": "Server is busy, please retry shortly"},
+        headers={"Retry-After": "1"},
+    )
+
+
+@app.exception_handler(EmailQueueFull)
+async def email_queue_full_handler(request: Request, exc: EmailQueueFull):
+    return JSONResponse(
+        status_code=503,
+        content={"detail": "Email delivery is backed up, please retry later"},
+        headers={"Retry-After": "30"},
+    )
+
+
+@app.exception_handler(RateLimitExceeded)
+async def rate_limit_exceeded_handler(request: Request, exc: RateLimitExceeded):
+    return JSONResponse(
+        status_code=429,
+        content={"detail": "Too many attempts, please retry later"},
+        headers={"Retry-After": str(math.ceil(exc.retry_after))},
+    )
+
+
 @app.get("/")
 def main():
     return {"message": "Hello World"}
+
+
+if settings.METRICS_ENABLED:
+
+    @app.get("/metrics", include_in_schema=False)
+    def metrics():
+        return PlainTextResponse(
+            render_prometheus(request_metrics.collect()),
+            media_type="text/plain; version=0.0.4",
+        )
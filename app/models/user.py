@@ -1,7 +1,7 @@
 import enum
 from datetime import datetime, timezone
 
-from sqlalchemy import Boolean, DateTime, Integer
+from sqlalchemy import Boolean, DateTime, Index, Integer, func, text
 from sqlalchemy import Enum as SAEnum
 from sqlalchemy.orm import Mapped, mapped_column
 from sqlmodel.sql.sqltypes import AutoString
@@ -17,6 +17,37 @@ class UserRole(str, enum.Enum):
 
 class User(Base):
     __tablename__ = "users"
+    __table_args__ = (
+        # Serves keyset pagination over live users without touching deleted rows
+        Index(
+            "ix_users_not_deleted_id",
+            "id",
+            postgresql_where=text("is_deleted = false"),
+            sqlite_where=text("is_deleted = 0"),
+        ),
+        # GET /users filters on live users, paged by id or creation time
+        Index(
+            "ix_users_not_deleted_roles_id",
+            "roles",
+            "id",
+            postgresql_where=text("is_deleted = false"),
+            sqlite_where=text("is_deleted = 0"),
+        ),
+        Index(
+            "ix_users_not_deleted_is_active_id",
+            "is_active",
+            "id",
+            postgresql_where=text("is_deleted = false"),
+            sqlite_where=text("is_deleted = 0"),
+        ),
+        Index(
+            "ix_users_not_deleted_time_added_id",
+            "time_added",
+            "id",
+            postgresql_where=text("is_deleted = false"),
+            sqlite_where=text("is_deleted = 0"),
+        ),
+    )
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True, index=True)
     username: Mapped[str] = mapped_column(
@@ -37,8 +68,38 @@ class User(Base):
     )
 
     last_updated_by: Mapped[str | None] = mapped_column(AutoString, nullable=True)
+    # Indexed so GET /users can read the collection's version cheaply
     last_update_time: Mapped[datetime | None] = mapped_column(
         DateTime,
+        index=True,
         default=lambda: datetime.now(timezone.utc),
         onupdate=lambda: datetime.now(timezone.utc),
     )
+
+
+# Username/email search indexes are PostgreSQL only: SQLite cannot use an
+# expression index for LIKE. text_pattern_ops serves case-insensitive prefix
+# matches whatever the database collation.
+Index(
+    "ix_users_username_lower",
+    func.lower(User.username).label("username_lower"),
+    postgresql_ops={"username_lower": "text_pattern_ops"},
+).ddl_if(dialect="postgresql")
+Index(
+    "ix_users_email_lower",
+    func.lower(User.email).label("email_lower"),
+    postgresql_ops={"email_lower": "text_pattern_ops"},
+).ddl_if(dialect="postgresql")
+# Substring search, through the pg_trgm extension
+Index(
+    "ix_users_username_trgm",
+    func.lower(User.username).label("username_trgm"),
+    postgresql_using="gin",
+    postgresql_ops={"username_trgm": "gin_trgm_ops"},
+).ddl_if(dialect="postgresql")
+Index(
+    "ix_users_email_trgm",
+    func.lower(User.email).label("email_trgm"),
+    postgresql_using="gin",
+    postgresql_ops={"email_trgm": "gin_trgm_ops"},
+).ddl_if(dialect="postgresql")
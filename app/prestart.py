@@ -0,0 +1,77 @@
+"""One-shot database preparation, run once per deployment before the workers.
+
+uv run python -m app.prestart
+"""
+
+import logging
+import time
+from collections.abc import Iterator
+
+from alembic import command
+from alembic.config import Config
+from alembic.runtime.migration import MigrationContext
+from alembic.script import ScriptDirectory
+
+from app.core.config import settings
+from app.core.db import engine
+from app.initial_data import main as init_data_main
+
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.INFO)
+
+ALEMBIC_CONFIG = "alembic.ini"
+
+
+def backoff_delays() -> Iterator[float]:
+    """Yield exponentially growing waits until DB_STARTUP_TIMEOUT_SECONDS."""
+    deadline = time.monotonic() + settings.DB_STARTUP_TIMEOUT_SECONDS
+    delay = settings.DB_STARTUP_BACKOFF_SECONDS
+    while (remaining := deadline - time.monotonic()) > 0:
+        yield min(delay, remaining)
+        delay = min(delay * 2, settings.DB_STARTUP_BACKOFF_MAX_SECONDS)
+
+
+def check_db() -> None:
+    with engine.connect():
+        pass
+
+
+def wait_for_db() -> None:
+    for delay in backoff_delays():
+        try:
+            check_db()
+            return
+        except Exception as e:
+            logger.warning(f"Waiting {delay:.1f}s for database to be ready: {e}")
+            time.sleep(delay)
+    check_db()
+
+
+def schema_revisions() -> tuple[str | None, str | None]:
+    """Return the database's Alembic revision and the migrations' head."""
+    head = ScriptDirectory.from_config(Config(ALEMBIC_CONFIG)).get_current_head()
+    with engine.connect() as conn:
+        current = MigrationContext.configure(conn).get_current_revision()
+    return current, head
+
+
+def migrate_and_seed() -> None:
+    logger.info("Running database migrations...")
+    command.upgrade(Config(ALEMBIC_CONFIG), "head")
+    logger.info("Migrations completed.")
+
+    logger.info("Initializing database data...")
+    init_data_main()
+    logger.info("Database initialization completed.")
+
+
+def main() -> None:
+    start = time.perf_counter()
+    wait_for_db()
+    migrate_and_seed()
+    logger.info(f"Prestart completed in {time.perf_counter() - start:.2f}s")
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    main()
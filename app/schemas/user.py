@@ -1,6 +1,7 @@
 from datetime import datetime
+from typing import Literal
 
-from pydantic import BaseModel, EmailStr
+from pydantic import BaseModel, EmailStr, Field, model_validator
 
 from app.models.user import UserRole
 
@@ -47,7 +48,69 @@ class UserResponse(UserBase):
         from_attributes = True
 
 
+# List endpoints select these columns and serialise the rows directly,
+# skipping UserResponse validation
+USER_RESPONSE_FIELDS = tuple(UserResponse.model_fields)
+
+
 # Properties to return for pagination
 class UserListResponse(BaseModel):
     items: list[UserResponse]
-    total: int
+    total: int | None = None
+    # Pass back as ``cursor`` to fetch the next page; None on the last page
+    next_cursor: str | None = None
+
+
+# Outcome of one line of a bulk import
+class UserImportResult(BaseModel):
+    row: int
+    status: Literal["created", "error"]
+    id: int | None = None
+    username: str | None = None
+    detail: str | None = None
+
+
+class UserImportResponse(BaseModel):
+    created: int
+    failed: int
+    results: list[UserImportResult]
+
+
+# Conditions selecting users; unset fields do not filter
+class UserFilter(BaseModel):
+    roles: UserRole | None = None
+    is_active: bool | None = None
+    added_after: datetime | None = None
+    added_before: datetime | None = None
+    # Case-insensitive; search matches anywhere in the username or email
+    username_prefix: str | None = None
+    email_prefix: str | None = None
+    search: str | None = None
+
+
+# Users a bulk action applies to: a list of ids or a filter, not both
+class UserBulkAction(BaseModel):
+    ids: list[int] | None = Field(None, min_length=1, max_length=10_000)
+    filter: UserFilter | None = None
+
+    @model_validator(mode="after")
+    def check_target(self) -> "UserBulkAction":
+        if (self.ids is None) == (self.filter is None):
+            raise ValueError("Send either ids or filter")
+        # An empty filter would select every user
+        if self.filter is not None and not self.filter.model_dump(exclude_none=True):
+            raise ValueError("filter needs at least one condition")
+        return self
+
+
+# Outcome of a bulk action for one user
+class UserBulkResult(BaseModel):
+    id: int
+    status: Literal["updated", "error"]
+    detail: str | None = None
+
+
+class UserBulkResponse(BaseModel):
+    updated: int
+    failed: int
+    results: list[UserBulkResult]
@@ -0,0 +1,66 @@
+"""Production server: several uvicorn workers on uvloop and httptools.
+
+uv run python -m app.server
+
+Run ``python -m app.prestart`` first; the workers only verify the schema.
+"""
+
+import importlib.util
+import logging
+import os
+import tempfile
+
+import uvicorn
+
+from app.core.config import settings
+from app.core.metrics import MultiprocessStore
+
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.INFO)
+
+# uvicorn's fast implementations and the modules they need
+_ACCELERATED = {"uvloop": "uvloop", "httptools": "httptools"}
+
+
+def _implementation(name: str) -> str:
+    module = _ACCELERATED.get(name)
+    if module is not None and importlib.util.find_spec(module) is None:
+        logger.warning(f"{module} is not installed, falling back to auto")
+        return "auto"
+    return name
+
+
+def _prepare_metrics_dir() -> None:
+    # Workers read settings from the environment they inherit from us
+    directory = settings.METRICS_MULTIPROC_DIR
+    if directory is None:
+        if not settings.METRICS_ENABLED or settings.SERVER_WORKERS == 1:
+            return
+        directory = tempfile.mkdtemp(prefix="app-metrics-")
+        os.environ["METRICS_MULTIPROC_DIR"] = directory
+    MultiprocessStore.clear(directory)
+
+
+def main() -> None:
+    _prepare_metrics_dir()
+    logger.info(
+        f"Starting {settings.SERVER_WORKERS} workers on "
+        f"{settings.SERVER_HOST}:{settings.SERVER_PORT}"
+    )
+    uvicorn.run(
+        "app.main:app",
+        host=settings.SERVER_HOST,
+        port=settings.SERVER_PORT,
+        workers=settings.SERVER_WORKERS,
+        loop=_implementation(settings.SERVER_LOOP),
+        http=_implementation(settings.SERVER_HTTP),
+        backlog=settings.SERVER_BACKLOG,
+        timeout_keep_alive=settings.SERVER_KEEPALIVE_SECONDS,
+        timeout_graceful_shutdown=settings.SERVER_GRACEFUL_SHUTDOWN_SECONDS,
+        access_log=settings.SERVER_ACCESS_LOG,
+    )
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    main()
@@ -1,12 +1,15 @@
 import logging
-import smtplib
+import re
+from collections.abc import Callable
+from dataclasses import dataclass
 from email.message import EmailMessage
 from pathlib import Path
 
-from jinja2 import Environment, FileSystemLoader
+from jinja2 import Environment, FileSystemLoader, Template
 from mjml import mjml_to_html
 
 from app.core.config import settings
+from app.utils.email_queue import EmailQueue, SMTPConnectionPool, SMTPSettings
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -15,9 +18,71 @@ logger = logging.getLogger(__name__)
 TEMPLATE_DIR = Path(__file__).parent.parent / "email-templates"
 env = Environment(loader=FileSystemLoader(str(TEMPLATE_DIR)))
 
+email_queue = EmailQueue(
+    SMTPConnectionPool(
+        SMTPSettings(
+            host=settings.SMTP_HOST or "",
+            port=int(settings.SMTP_PORT or 587),
+            tls=settings.SMTP_TLS,
+            user=settings.SMTP_USER,
+            password=settings.SMTP_PASSWORD,
+            timeout=settings.SMTP_TIMEOUT,
+        ),
+        size=settings.SMTP_POOL_SIZE,
+        max_idle=settings.SMTP_MAX_IDLE_SECONDS,
+    ),
+    workers=settings.EMAIL_QUEUE_WORKERS,
+    max_size=settings.EMAIL_QUEUE_MAX_SIZE,
+    batch_size=settings.EMAIL_BATCH_SIZE,
+    max_retries=settings.EMAIL_MAX_RETRIES,
+    retry_backoff=settings.EMAIL_RETRY_BACKOFF_SECONDS,
+)
+
+
+JINJA_TAG = re.compile(r"{{.*?}}|{%.*?%}", re.DOTALL)
+
+
+@dataclass
+class _CompiledTemplate:
+    template: Template | None
+    uptodate: Callable[[], bool] | None
+
+
+# MJML output per template name, with the Jinja tags left in place
+_compiled: dict[str, _CompiledTemplate] = {}
+
+
+def _compile_email_template(template_name: str) -> _CompiledTemplate:
+    source, _, uptodate = env.loader.get_source(env, template_name)
+    html = mjml_to_html(source).html
+    if sorted(JINJA_TAG.findall(html)) != sorted(JINJA_TAG.findall(source)):
+        # MJML rewrote a Jinja tag; this template has to compile per render
+        logger.warning(f"Cannot precompile {template_name}, Jinja tags changed")
+        return _CompiledTemplate(template=None, uptodate=uptodate)
+    return _CompiledTemplate(template=env.from_string(html), uptodate=uptodate)
+
+
+def precompile_email_templates() -> None:
+    for template_name in env.list_templates(extensions=["mjml"]):
+        _compiled[template_name] = _compile_email_template(template_name)
+
 
 def render_email_template(template_name: str, **kwargs) -> str:
-    """Renders a Jinja2 MJML template and converts it to HTML."""
+    """Renders an MJML email template to HTML.
+
+    The MJML layout is compiled to HTML once per template and the Jinja2
+    variables are substituted into the cached HTML.
+    """
+    compiled = _compiled.get(template_name)
+    if compiled is None or (
+        settings.EMAIL_TEMPLATES_AUTO_RELOAD
+        and compiled.uptodate is not None
+        and not compiled.uptodate()
+    ):
+        compiled = _compiled[template_name] = _compile_email_template(template_name)
+    if compiled.template is not None:
+        return compiled.template.render(**kwargs)
+
     template = env.get_template(template_name)
     mjml_content = template.render(**kwargs)
     result = mjml_to_html(mjml_content)
@@ -37,15 +102,8 @@ def send_email(
     message["To"] = email_to
     message["Subject"] = subject
     message.set_content(html_content, subtype="html")
-
-    with smtplib.SMTP(
-        str(settings.SMTP_HOST), int(settings.SMTP_PORT or 587)
-    ) as server:
-        if settings.SMTP_TLS:
-            server.starttls()
-        if settings.SMTP_USER and settings.SMTP_PASSWORD:
-            server.login(settings.SMTP_USER, settings.SMTP_PASSWORD)
-        server.send_message(message)
+    # Delivered in the background; raises EmailQueueFull if the queue is full
+    email_queue.enqueue(message)
 
 
 def send_test_email(email_to: str, subject: str = "", html_content: str = "") -> None:
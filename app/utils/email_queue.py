@@ -0,0 +1,304 @@
+import logging
+import queue
+import smtplib
+import threading
+import time
+from dataclasses import dataclass, field
+from email.message import EmailMessage
+from typing import Any
+
+from app.core.metrics import Histogram
+
+logger = logging.getLogger(__name__)
+
+# The relay rejected this message; retrying it will not help
+PERMANENT_ERRORS = (
+    smtplib.SMTPRecipientsRefused,
+    smtplib.SMTPSenderRefused,
+    smtplib.SMTPDataError,
+)
+
+
+class EmailQueueFull(Exception):
+    """Raised when the outbound queue cannot take another message."""
+
+
+@dataclass
+class SMTPSettings:
+    host: str
+    port: int
+    tls: bool
+    user: str | None
+    password: str | None
+    timeout: float
+
+
+class SMTPConnectionPool:
+    """Keeps logged-in SMTP connections open between messages."""
+
+    def __init__(self, config: SMTPSettings, size: int, max_idle: float) -> None:
+        self.config = config
+        self.size = size
+        self.max_idle = max_idle
+        self._idle: list[tuple[smtplib.SMTP, float]] = []
+        self._slots = threading.BoundedSemaphore(size)
+        self._lock = threading.Lock()
+
+    def _connect(self) -> smtplib.SMTP:
+        config = self.config
+        server = smtplib.SMTP(config.host, config.port, timeout=config.timeout)
+        try:
+            if config.tls:
+                server.starttls()
+            if config.user and config.password:
+                server.login(config.user, config.password)
+        except BaseException:
+            server.close()
+            raise
+        return server
+
+    def _alive(self, server: smtplib.SMTP, idle_since: float) -> bool:
+        if time.monotonic() - idle_since < self.max_idle:
+            return True
+        # Relays drop idle sessions; probe before reusing an old one
+        try:
+            return server.noop()[0] == 250
+        except OSError:
+            return False
+
+    def acquire(self) -> smtplib.SMTP:
+        self._slots.acquire()
+        try:
+            while True:
+                with self._lock:
+                    if not self._idle:
+                        break
+                    server, idle_since = self._idle.pop()
+                if self._alive(server, idle_since):
+                    return server
+                self._close(server)
+            return self._connect()
+        except BaseException:
+            self._slots.release()
+            raise
+
+    def release(self, server: smtplib.SMTP) -> None:
+        with self._lock:
+            self._idle.append((server, time.monotonic()))
+        self._slots.release()
+
+    def discard(self, server: smtplib.SMTP) -> None:
+        self._close(server)
+        self._slots.release()
+
+    def _close(self, server: smtplib.SMTP) -> None:
+        try:
+            server.quit()
+        except OSError:
+            server.close()
+
+    def close(self) -> None:
+        with self._lock:
+            idle, self._idle = self._idle, []
+        for server, _ in idle:
+            self._close(server)
+
+
+@dataclass
+class _Job:
+    message: EmailMessage
+    enqueued_at: float = field(default_factory=time.monotonic)
+    attempts: int = 0
+
+
+class EmailQueue:
+    """Delivers messages from a bounded queue on background worker threads.
+
+    Each worker takes up to ``batch_size`` queued messages and sends them over
+    one pooled connection. Failed sends are retried with exponential backoff.
+    """
+
+    def __init__(
+        self,
+        pool: SMTPConnectionPool,
+        *,
+        workers: int,
+        max_size: int,
+        batch_size: int,
+        max_retries: int,
+        retry_backoff: float,
+    ) -> None:
+        self.pool = pool
+        self.workers = workers
+        self.batch_size = batch_size
+        self.max_retries = max_retries
+        self.retry_backoff = retry_backoff
+        self.sent = 0
+        self.failed = 0
+        self.retried = 0
+        self.send_latency = Histogram()
+        self.delivery_latency = Histogram()
+        self._queue: queue.Queue[_Job | None] = queue.Queue(maxsize=max_size)
+        self._threads: list[threading.Thread] = []
+        self._retry_timers: set[threading.Timer] = set()
+        self._stopping = False
+        self._lock = threading.Lock()
+
+    def start(self) -> None:
+        with self._lock:
+            if self._threads:
+                return
+            self._stopping = False
+            for index in range(self.workers):
+                thread = threading.Thread(
+                    target=self._run, name=f"email-queue-{index}", daemon=True
+                )
+                thread.start()
+                self._threads.append(thread)
+
+    def enqueue(self, message: EmailMessage) -> None:
+        self.start()
+        try:
+            self._queue.put_nowait(_Job(message))
+        except queue.Full:
+            raise EmailQueueFull("Outbound email queue is full")
+
+    def stop(self, timeout: float | None = None) -> None:
+        """Deliver what is queued, then stop the workers and close connections.
+
+        Messages waiting out a retry backoff, or failing again while the queue
+        drains, are given up on rather than held past shutdown.
+        """
+        with self._lock:
+            self._stopping = True
+            threads, self._threads = self._threads, []
+            timers, self._retry_timers = self._retry_timers, set()
+        for timer in timers:
+            timer.cancel()
+            self._fail(timer.args[0], RuntimeError("Email queue stopped"))
+        if timers:
+            logger.warning("Dropped %d emails waiting to be retried", len(timers))
+        for _ in threads:
+            self._queue.put(None)
+        for thread in threads:
+            thread.join(timeout)
+        self.pool.close()
+
+    def _next_batch(self) -> list[_Job] | None:
+        job = self._queue.get()
+        if job is None:
+            return None
+        batch = [job]
+        while len(batch) < self.batch_size:
+            try:
+                job = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if job is None:
+                # Leave the stop sentinel for after this batch
+                self._queue.put(None)
+                break
+            batch.append(job)
+        return batch
+
+    def _run(self) -> None:
+        while (batch := self._next_batch()) is not None:
+            try:
+                self._send_batch(batch)
+            except Exception:
+                logger.exception("Email worker failed to send a batch")
+
+    def _send_batch(self, batch: list[_Job]) -> None:
+        try:
+            server = self.pool.acquire()
+        except OSError as e:
+            # Each counts as an attempt, so a relay that stays down backs off
+            # and eventually fails the messages
+            for job in batch:
+                job.attempts += 1
+                self._retry(job, e)
+            return
+        reusable = False
+        try:
+            for index, job in enumerate(batch):
+                job.attempts += 1
+                start = time.monotonic()
+                try:
+                    server.send_message(job.message)
+                except PERMANENT_ERRORS as e:
+                    self._fail(job, e)
+                    continue
+                except OSError as e:
+                    # SMTPException is an OSError too: the connection is in an
+                    # unknown state, so drop it and retry this and the rest
+                    for pending in batch[index:]:
+                        self._retry(pending, e)
+                    return
+                except Exception as e:
+                    # A message that cannot be sent, such as one that does not
+                    # encode; reset the session for the rest of the batch
+                    logger.exception("Cannot send email to %s", job.message["To"])
+                    self._fail(job, e)
+                    try:
+                        server.rset()
+                    except OSError as reset_error:
+                        for pending in batch[index + 1 :]:
+                            self._retry(pending, reset_error)
+                        return
+                    continue
+                now = time.monotonic()
+                self.send_latency.observe(now - start)
+                self.delivery_latency.observe(now - job.enqueued_at)
+                with self._lock:
+                    self.sent += 1
+            reusable = True
+        finally:
+            # Always hand the pool slot back, whatever escaped
+            if reusable:
+                self.pool.release(server)
+            else:
+                self.pool.discard(server)
+
+    def _retry(self, job: _Job, error: Exception) -> None:
+        if job.attempts >= self.max_retries or self._stopping:
+            self._fail(job, error)
+            return
+        delay = self.retry_backoff * 2 ** max(job.attempts - 1, 0)
+        logger.warning(
+            "Retrying email to %s in %.1fs: %s", job.message["To"], delay, error
+        )
+        timer = threading.Timer(delay, self._requeue, args=(job,))
+        timer.daemon = True
+        with self._lock:
+            self.retried += 1
+            self._retry_timers.add(timer)
+        timer.start()
+
+    def _requeue(self, job: _Job) -> None:
+        with self._lock:
+            timer = threading.current_thread()
+            if timer not in self._retry_timers:
+                # stop() has already given up on it
+                return
+            self._retry_timers.discard(timer)
+        try:
+            self._queue.put_nowait(job)
+        except queue.Full:
+            self._fail(job, EmailQueueFull("Outbound email queue is full"))
+
+    def _fail(self, job: _Job, error: Exception) -> None:
+        logger.error("Giving up on email to %s: %s", job.message["To"], error)
+        with self._lock:
+            self.failed += 1
+
+    def snapshot(self) -> dict[str, Any]:
+        return {
+            "depth": self._queue.qsize(),
+            "workers": len(self._threads),
+            "sent": self.sent,
+            "failed": self.failed,
+            "retried": self.retried,
+            "pending_retries": len(self._retry_timers),
+            "send_seconds": self.send_latency.snapshot(),
+            "delivery_seconds": self.delivery_latency.snapshot(),
+        }
@@ -0,0 +1,49 @@
+import os
+import tempfile
+from collections.abc import Iterator
+from contextlib import asynccontextmanager
+
+import pytest
+
+# Settings and engines are read at import time, so configure them first
+_db_dir = tempfile.mkdtemp(prefix="framework-python-tests-")
+os.environ["DATABASE_URL"] = f"sqlite:///{_db_dir}/test.db"
+os.environ["DB_STARTUP_MODE"] = "skip"
+# An endpoint running more statements than its query budget fails the test
+os.environ["QUERY_BUDGET_MODE"] = "raise"
+os.environ["BCRYPT_ROUNDS"] = "4"
+
+from fastapi import FastAPI  # noqa: E402
+from fastapi.testclient import TestClient  # noqa: E402
+
+from app.api.api_v1.endpoints import users, users_async  # noqa: E402
+from app.core import request_metrics, threadpool  # noqa: E402
+from app.core.config import settings  # noqa: E402
+from app.core.db import async_engine, engine  # noqa: E402
+from app.models.base import Base  # noqa: E402
+
+
+@pytest.fixture(scope="session", autouse=True)
+def schema() -> Iterator[None]:
+    Base.metadata.create_all(engine)
+    yield
+    Base.metadata.drop_all(engine)
+    engine.dispose()
+
+
+@pytest.fixture(params=["sync", "async"])
+def client(request: pytest.FixtureRequest) -> Iterator[TestClient]:
+    """A client for the users router of each DB_MODE."""
+    router = users.router if request.param == "sync" else users_async.router
+
+    @asynccontextmanager
+    async def lifespan(app: FastAPI):
+        threadpool.configure()
+        yield
+        await async_engine.dispose()
+
+    app = FastAPI(lifespan=lifespan)
+    app.add_middleware(request_metrics.MetricsMiddleware)
+    app.include_router(router, prefix=f"{settings.API_V1_STR}/users")
+    with TestClient(app) as test_client:
+        yield test_client
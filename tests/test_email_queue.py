@@ -0,0 +1,120 @@
+import socket
+import time
+from collections.abc import Callable
+from email.message import EmailMessage
+
+from app.utils.email_queue import EmailQueue, SMTPConnectionPool, SMTPSettings, _Job
+
+
+def unused_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def message(to: str) -> EmailMessage:
+    msg = EmailMessage()
+    msg["From"] = "noreply@example.com"
+    msg["To"] = to
+    msg["Subject"] = "Test"
+    msg.set_content("Hello")
+    return msg
+
+
+def make_queue(pool: SMTPConnectionPool, **kwargs) -> EmailQueue:
+    options = {
+        "workers": 1,
+        "max_size": 10,
+        "batch_size": 10,
+        "max_retries": 2,
+        "retry_backoff": 0.01,
+    }
+    return EmailQueue(pool, **{**options, **kwargs})
+
+
+def wait_for(condition: Callable[[], bool], timeout: float = 5.0) -> None:
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "timed out"
+        time.sleep(0.01)
+
+
+class FakeSMTP:
+    """Accepts every message except those to ``bad@example.com``."""
+
+    def __init__(self) -> None:
+        self.sent: list[str] = []
+        self.resets = 0
+
+    def send_message(self, msg: EmailMessage) -> None:
+        if msg["To"] == "bad@example.com":
+            raise UnicodeEncodeError("ascii", "é", 0, 1, "cannot encode")
+        self.sent.append(msg["To"])
+
+    def rset(self) -> None:
+        self.resets += 1
+
+    def noop(self) -> tuple[int, bytes]:
+        return 250, b"OK"
+
+    def quit(self) -> None:
+        pass
+
+    def close(self) -> None:
+        pass
+
+
+def fake_pool(server: FakeSMTP, size: int = 1) -> SMTPConnectionPool:
+    pool = SMTPConnectionPool(
+        SMTPSettings("localhost", 25, False, None, None, 1.0), size, max_idle=60
+    )
+    pool._connect = lambda: server
+    return pool
+
+
+def test_unreachable_relay_backs_off_and_gives_up() -> None:
+    pool = SMTPConnectionPool(
+        SMTPSettings("127.0.0.1", unused_port(), False, None, None, 1.0),
+        size=1,
+        max_idle=60,
+    )
+    email_queue = make_queue(pool)
+    email_queue.enqueue(message("user@example.com"))
+    wait_for(lambda: email_queue.failed == 1)
+    time.sleep(0.1)
+    assert email_queue.retried == 1
+    assert email_queue.failed == 1
+    assert email_queue.snapshot()["pending_retries"] == 0
+    email_queue.stop(timeout=1)
+
+
+def test_unsendable_message_fails_alone_and_frees_the_connection() -> None:
+    server = FakeSMTP()
+    pool = fake_pool(server)
+    email_queue = make_queue(pool)
+    # Queued before the worker starts, so the three go out as one batch
+    for to in ("a@example.com", "bad@example.com", "b@example.com"):
+        email_queue._queue.put_nowait(_Job(message(to)))
+    email_queue.start()
+    wait_for(lambda: email_queue.sent + email_queue.failed == 3)
+    assert server.sent == ["a@example.com", "b@example.com"]
+    assert email_queue.failed == 1
+    assert server.resets == 1
+    # The pool's only slot is free again
+    assert pool._slots.acquire(timeout=1)
+    pool._slots.release()
+    email_queue.stop(timeout=1)
+
+
+def test_stop_fails_messages_waiting_to_retry() -> None:
+    pool = SMTPConnectionPool(
+        SMTPSettings("127.0.0.1", unused_port(), False, None, None, 1.0),
+        size=1,
+        max_idle=60,
+    )
+    email_queue = make_queue(pool, max_retries=5, retry_backoff=60)
+    email_queue.enqueue(message("user@example.com"))
+    wait_for(lambda: email_queue.snapshot()["pending_retries"] == 1)
+    email_queue.stop(timeout=1)
+    assert email_queue.failed == 1
+    assert email_queue.snapshot()["pending_retries"] == 0
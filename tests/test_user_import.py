@@ -0,0 +1,42 @@
+from datetime import datetime, timezone
+
+from sqlalchemy import event, insert
+
+from app.api.api_v1.endpoints.users_bulk import _import_chunk
+from app.core.db import engine
+from app.models.user import User
+from app.schemas.user import UserCreate
+
+
+def user_in(name: str) -> UserCreate:
+    return UserCreate(username=name, email=f"{name}@example.com", password="pw")
+
+
+def test_concurrent_conflict_fails_only_its_row() -> None:
+    rows = [(row, user_in(f"import{row}")) for row in range(1, 4)]
+    clashed = False
+
+    # Another request creates import2 between the clash check and the INSERT
+    def create_clash(conn, cursor, statement, parameters, context, executemany):
+        nonlocal clashed
+        if statement.startswith("INSERT INTO users") and not clashed:
+            clashed = True
+            with engine.begin() as other:
+                other.execute(
+                    insert(User).values(
+                        username="import2",
+                        email="import2@example.com",
+                        hashed_password="x",
+                        time_added=datetime.now(timezone.utc),
+                    )
+                )
+
+    event.listen(engine, "before_cursor_execute", create_clash)
+    try:
+        results = _import_chunk(rows, "admin", False, set(), set())
+    finally:
+        event.remove(engine, "before_cursor_execute", create_clash)
+
+    assert [result.status for result in results] == ["created", "error", "created"]
+    assert results[1].detail == "A conflicting user was created concurrently"
+    assert all(result.id for result in (results[0], results[2]))
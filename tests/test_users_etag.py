@@ -0,0 +1,42 @@
+from datetime import datetime, timedelta, timezone
+
+from fastapi.testclient import TestClient
+from sqlalchemy import update
+from test_user_write_statements import USERS, add_user, login
+
+from app.core.db import SessionLocal
+from app.models.user import User, UserRole
+
+
+def test_list_etag_changes_on_write_with_an_old_timestamp(
+    client: TestClient,
+) -> None:
+    admin_id = add_user(UserRole.ADMIN)
+    headers = login(client, admin_id)
+    user_id = add_user()
+    with SessionLocal() as db:
+        db.execute(
+            update(User)
+            .where(User.id == admin_id)
+            .values(last_update_time=datetime.now(timezone.utc))
+        )
+        db.commit()
+    etag = client.get(f"{USERS}/", headers=headers).headers["ETag"]
+
+    # Soft-deleted by a host whose clock is behind, so the newest
+    # last_update_time and id are both unchanged
+    with SessionLocal() as db:
+        db.execute(
+            update(User)
+            .where(User.id == user_id)
+            .values(
+                is_active=False,
+                is_deleted=True,
+                last_update_time=datetime.now(timezone.utc) - timedelta(days=1),
+            )
+        )
+        db.commit()
+
+    response = client.get(f"{USERS}/", headers={**headers, "If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.headers["ETag"] != etag